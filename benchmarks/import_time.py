@@ -0,0 +1,85 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+Measures the cold import time of the converter with `python -X importtime` and
+fails if it grows beyond a budget or if a lazily loaded dependency is imported eagerly.
+
+    python benchmarks/import_time.py [--module excel_catalogue_to_xml] [--runs 5] [--max-ms 50]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Dependencies that must only be loaded on first use
+LAZY_MODULES = ("openpyxl", "uuid", "datetime", "configparser")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    '''
+    Imports the module in a fresh interpreter
+    :param module: name of the module to import
+    :return: (cumulative import time in microseconds, set of imported module names)
+    '''
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    total_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        imported.add(name.strip())
+        if name.strip() == module:
+            total_us = int(cumulative)
+    return total_us, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time regression check")
+    parser.add_argument("--module", default="excel_catalogue_to_xml")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=50.0, help="Budget for the best of all runs")
+    args = parser.parse_args()
+
+    timings = []
+    imported = set()
+    for _ in range(args.runs):
+        total_us, imported = measure(args.module)
+        timings.append(total_us)
+
+    best_ms = min(timings) / 1000
+    print(f"{args.module}: best {best_ms:.1f} ms, worst {max(timings) / 1000:.1f} ms over {args.runs} runs")
+
+    failed = False
+    eager = sorted(name for name in imported if name.split(".")[0] in LAZY_MODULES)
+    if eager:
+        print(f"Eagerly imported: {', '.join(eager)}")
+        failed = True
+    if best_ms > args.max_ms:
+        print(f"Import time exceeds budget of {args.max_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
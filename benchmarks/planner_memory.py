@@ -0,0 +1,158 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+Compares the planner's memory estimates with the measured peak RSS of real conversions. Generates
+SFTI template workbooks with every mapped CatalogueLines column filled, converts each one with both
+strategies in a fresh interpreter and reports estimate and measurement side by side. Exits with 1 if
+any estimate is below the measured peak.
+
+The cost model constants in planner.py were fitted with this script (Linux, CPython 3.11, openpyxl 3.1)
+on 1000-20000 lines with 25-100 filled columns, 12-200 character values, unique and repeated values,
+inline and shared strings, with and without --max-line-items.
+
+    python benchmarks/planner_memory.py [--lines 1000 5000] [--columns 100] [--text-length 12] [--repeated]
+                                        [--shared-strings] [--max-line-items N]
+"""
+import argparse
+import datetime
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from planner import STRATEGIES, estimate, inspect_workbook  # noqa: E402
+
+_MEASURE = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from excel_catalogue_to_xml import excel_to_xml
+max_line_items = int(sys.argv[4]) if sys.argv[4] else None
+xml = excel_to_xml(sys.argv[2], strategy=sys.argv[3], max_line_items=max_line_items)
+try:
+    # Peak RSS of this process only; ru_maxrss would include the parent's RSS at fork time
+    with open("/proc/self/status") as f:
+        print(next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmHWM:")))
+except OSError:
+    import resource
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024))
+"""
+
+
+_INLINE_STRING = re.compile(rb'<c r="([A-Z]+\d+)"([^>]*?) t="inlineStr"><is><t>(.*?)</t></is></c>')
+
+
+def _to_shared_strings(path):
+    # openpyxl writes inline strings, Excel writes a shared string table; rewrite the sheets the way Excel does
+    strings = {}
+
+    def shared(match):
+        index = strings.setdefault(match.group(3), len(strings))
+        return b'<c r="%s"%s t="s"><v>%d</v></c>' % (match.group(1), match.group(2), index)
+
+    with zipfile.ZipFile(path) as zf:
+        parts = {info.filename: zf.read(info) for info in zf.infolist()}
+    for name in parts:
+        if name.startswith("xl/worksheets/"):
+            parts[name] = _INLINE_STRING.sub(shared, parts[name])
+
+    table = b"".join(b"<si><t>%s</t></si>" % text for text in strings)
+    parts["xl/sharedStrings.xml"] = (b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="%d" uniqueCount="%d">'
+                                     % (len(strings), len(strings)) + table + b"</sst>")
+    parts["[Content_Types].xml"] = parts["[Content_Types].xml"].replace(
+        b"</Types>", b'<Override PartName="/xl/sharedStrings.xml" '
+                     b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml" /></Types>')
+    parts["xl/_rels/workbook.xml.rels"] = parts["xl/_rels/workbook.xml.rels"].replace(
+        b"</Relationships>", b'<Relationship Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+                             b'Target="sharedStrings.xml" Id="rIdSharedStrings" /></Relationships>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+
+def make_workbook(path, lines, columns=100, text_length=12, repeated=False, shared_strings=False):
+    '''
+    Writes an SFTI template workbook with text in the first columns of every catalogue line
+    :param lines: number of catalogue lines
+    :param columns: number of filled CatalogueLines columns, from the first
+    :param text_length: minimum length of each cell value
+    :param repeated: the same value in every row of a column instead of a unique one
+    :param shared_strings: write a shared string table like Excel instead of openpyxl's inline strings
+    '''
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    header = wb.active
+    header.title = "CatalogueHeader"
+    for cell, value in {"B3": "CAT-1", "C3": "Add", "E3": "SEK", "F3": "NEJ", "B5": datetime.datetime(2024, 5, 1),
+                        "F5": "Generated catalogue", "B8": "0007", "C8": "5560000000", "F8": "Supplier AB",
+                        "B9": "0007", "C9": "2120000000", "F9": "Buyer"}.items():
+        header[cell] = value
+
+    sheet_lines = wb.create_sheet("CatalogueLines")
+    sheet_lines.append(list(range(1, 101)))
+    sheet_lines.append([f"Column {i}" for i in range(1, 101)])
+    for line in range(1, lines + 1):
+        sheet_lines.append([line] + [(f"Value {column}" if repeated else f"Value {column}-{line}").ljust(text_length, "x")
+                                     for column in range(2, columns + 1)])
+
+    code_lists = wb.create_sheet("CodeLists")
+    code_lists["T3"], code_lists["U3"] = "Styck", "EA"
+    wb.save(path)
+    if shared_strings:
+        _to_shared_strings(path)
+
+
+def measure(path, strategy, max_line_items=None) -> int:
+    '''
+    Converts the workbook in a new interpreter
+    :return: peak RSS in bytes
+    '''
+    output = subprocess.check_output([sys.executable, "-c", _MEASURE, REPO_DIR, path, strategy, str(max_line_items or "")], text=True)
+    return int(output.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner memory estimate against measured peak RSS")
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--text-length", type=int, default=12)
+    parser.add_argument("--repeated", action="store_true", help="Same value in every row of a column")
+    parser.add_argument("--shared-strings", action="store_true", help="Shared string table like Excel writes")
+    parser.add_argument("--max-line-items", type=int, default=None)
+    args = parser.parse_args()
+
+    underestimated = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for lines in args.lines:
+            path = os.path.join(directory, f"{lines}.xlsx")
+            make_workbook(path, lines, args.columns, args.text_length, args.repeated, args.shared_strings)
+            stats = inspect_workbook(path)
+            for strategy in STRATEGIES:
+                estimated = estimate(stats, strategy, args.max_line_items)["memory"]
+                measured = measure(path, strategy, args.max_line_items)
+                underestimated += estimated < measured
+                print(f"{lines:>7} lines {strategy:<10} estimated {estimated / 2 ** 20:7.1f} MB, measured {measured / 2 ** 20:7.1f} MB "
+                      f"({estimated / measured:.2f}x)")
+    return 1 if underestimated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
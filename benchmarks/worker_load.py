@@ -0,0 +1,89 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+Local load test of the resident worker: starts `python -m excel_catalogue_to_xml serve`,
+sends a number of conversion jobs for one workbook over stdin and reports the sustained
+jobs per second together with the worker's own statistics.
+
+    python benchmarks/worker_load.py WORKBOOK.xlsx [--jobs 200] [--workers 4] [--pool process]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker load test")
+    parser.add_argument("workbook")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pool", choices=("process", "thread"), default="process")
+    parser.add_argument("--max-line-items", type=int, default=None)
+    args = parser.parse_args()
+
+    command = [sys.executable, "-m", "excel_catalogue_to_xml", "serve", "--pool", args.pool]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        worker = subprocess.Popen(command, cwd=REPO_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+
+        # Pool processes only start (and import openpyxl) on their first job, so one real job per
+        # worker is answered before starting the clock
+        warmup_jobs = args.workers or os.cpu_count() or 1
+        for i in range(warmup_jobs):
+            job = {"id": f"warmup-{i}", "input": os.path.abspath(args.workbook), "output": os.path.join(output_dir, f"warmup-{i}.xml"),
+                   "max_line_items": args.max_line_items}
+            worker.stdin.write(json.dumps(job) + "\n")
+        for _ in range(warmup_jobs):
+            response = json.loads(worker.stdout.readline())
+            if response["status"] != "ok":
+                print(f"Warm-up job failed: {response.get('error')}", file=sys.stderr)
+                worker.stdin.close()
+                worker.wait()
+                return 1
+
+        start = time.perf_counter()
+        for i in range(args.jobs):
+            job = {"id": i, "input": os.path.abspath(args.workbook), "output": os.path.join(output_dir, f"{i}.xml"),
+                   "max_line_items": args.max_line_items}
+            worker.stdin.write(json.dumps(job) + "\n")
+
+        failed = 0
+        for _ in range(args.jobs):
+            response = json.loads(worker.stdout.readline())
+            if response["status"] != "ok":
+                failed += 1
+        elapsed = time.perf_counter() - start
+
+        worker.stdin.write(json.dumps({"id": "stats", "op": "stats"}) + "\n")
+        stats = json.loads(worker.stdout.readline())
+        worker.stdin.close()
+        worker.wait()
+
+    print(f"{args.jobs} jobs in {elapsed:.2f} s: {args.jobs / elapsed:.1f} jobs/s, {failed} failed")
+    print(json.dumps(stats, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+Columnar input for the CatalogueLines data: CSV, and Parquet or Arrow IPC/Feather files when
+pyarrow is installed. Columns are positional, in the column order of the SFTI template, so they
+are mapped through the same [LineColIndex] indices as the Excel input.
+
+Header fields and code lists come from the template workbook (CatalogueHeader and CodeLists
+sheets) or from a JSON sidecar:
+
+    {"header": {"CATALOGUE_ID": "CAT-1", "CURRENCY_ID": "SEK", ...},
+     "code_lists": {"LIST_UNIT_CODE": {"Styck": "EA"},
+                    "LIST_ITEM_ATTRIBUTE_CODE": {"Name": {"Code": "C1", "Attr1": "L1", "Attr2": "V1", "Attr3": "Q1"}}}}
+"""
+import csv
+import functools
+import hashlib
+import json
+import os
+
+from excel_catalogue_to_xml import catalogue_to_xml, _workbook_loader
+from helper_functions import CONFIG_FILE, HeaderValues, load_config, load_col_indices, load_code_lists, read_header, \
+    reset_read_only_dimensions
+
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+
+_FORMATS_BY_EXTENSION = {".csv": FORMAT_CSV, ".txt": FORMAT_CSV, ".parquet": FORMAT_PARQUET, ".pq": FORMAT_PARQUET,
+                         ".arrow": FORMAT_ARROW, ".feather": FORMAT_ARROW, ".ipc": FORMAT_ARROW}
+
+# Rows per record batch when reading Parquet
+BATCH_SIZE = 65536
+
+
+def input_format(path) -> str:
+    extension = os.path.splitext(str(path))[1].lower()
+    try:
+        return _FORMATS_BY_EXTENSION[extension]
+    except KeyError:
+        raise ValueError(f"Unknown columnar input format: {extension}")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Reading Parquet or Arrow input requires pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+
+def _file_digest(path) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def load_header_source(header_file, config_file=CONFIG_FILE):
+    '''
+    Reads header fields and code lists from the template workbook or a JSON sidecar
+    :param header_file: path to an .xlsx template or a .json sidecar
+    :param config_file: path to the cell location config
+    :return: (header values, code lists)
+    '''
+    config = load_config(config_file)
+
+    if str(header_file).lower().endswith(".json"):
+        with open(header_file, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+
+        # Fields not given in the sidecar are treated as empty cells
+        header = HeaderValues({name.upper(): None for name in config.options("HeaderCell")})
+        header.update({name.upper(): value for name, value in sidecar.get("header", {}).items()})
+
+        code_lists = {}
+        for list_name, entries in sidecar.get("code_lists", {}).items():
+            code_list = {}
+            for name, entry in entries.items():
+                if not isinstance(entry, dict):
+                    entry = {"Code": entry}
+                code_list[str(name)] = {"Code": entry.get("Code"), "Attr1": entry.get("Attr1", ""),
+                                        "Attr2": entry.get("Attr2", ""), "Attr3": entry.get("Attr3", "")}
+            code_lists[list_name.upper()] = code_list
+        return header, code_lists
+
+    # Read-only, as the template may still carry catalogue lines that are not needed here
+    load_workbook = _workbook_loader()
+    try:
+        wb = load_workbook(filename=header_file, read_only=True)
+    except Exception as e:
+        raise ValueError("Not a valid Excel file") from e
+    try:
+        try:
+            sheet_header = wb["CatalogueHeader"]
+            wb["CodeLists"]
+        except Exception as e:
+            raise ValueError("Excel sheet names not according to SFTI template.") from e
+        reset_read_only_dimensions(wb, ("CodeLists",))
+        header = read_header(sheet_header, config)
+        code_lists = load_code_lists(wb, config)
+    finally:
+        wb.close()
+    return header, code_lists
+
+
+def read_csv_lines(path, delimiter=",", encoding="utf-8-sig", skip_rows=1, config_file=CONFIG_FILE):
+    '''
+    Streams catalogue lines from a CSV file
+    :param skip_rows: number of heading rows before the first catalogue line
+    :return: iterator of (line number, row values), empty fields as None like empty Excel cells
+    '''
+    width = max(load_col_indices(config_file).values()) + 1
+    with open(path, "r", encoding=encoding, newline="") as f:
+        for line_number, row in enumerate(csv.reader(f, delimiter=delimiter), 1):
+            if line_number <= skip_rows:
+                continue
+            values = [value if value != "" else None for value in row]
+            if len(values) < width:
+                values.extend([None] * (width - len(values)))
+            yield line_number, values
+
+
+def _batch_rows(batches, width):
+    # Column-wise record batches to row tuples; rows are numbered from 1
+    row_number = 0
+    for batch in batches:
+        columns = [column.to_pylist() for column in batch.columns]
+        if len(columns) < width:
+            columns.extend([[None] * batch.num_rows] * (width - len(columns)))
+        for values in zip(*columns):
+            row_number += 1
+            yield row_number, values
+
+
+def read_parquet_lines(path, batch_size=BATCH_SIZE, config_file=CONFIG_FILE):
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    width = max(load_col_indices(config_file).values()) + 1
+    yield from _batch_rows(pq.ParquetFile(path).iter_batches(batch_size=batch_size), width)
+
+
+def read_arrow_lines(path, config_file=CONFIG_FILE):
+    pa = _require_pyarrow()
+    import pyarrow.ipc
+
+    width = max(load_col_indices(config_file).values()) + 1
+    with pa.memory_map(str(path), "r") as source:
+        reader = pyarrow.ipc.open_file(source)
+        yield from _batch_rows((reader.get_batch(i) for i in range(reader.num_record_batches)), width)
+
+
+def columnar_to_xml(lines_file, header_file, max_line_items=None, instance_identifier=None, creation_date_time=None, deterministic=False,
+                    cache=None, integrity_check=None, fail_on_integrity_errors=False, delimiter=",", skip_rows=1,
+                    config_file=CONFIG_FILE) -> str:
+    '''
+    Transforms catalogue lines from a CSV/Parquet/Arrow file into Peppol BIS Catalogue XML
+    :param lines_file: path to the catalogue lines, columns in the order of the SFTI template
+    :param header_file: path to the template workbook or a JSON sidecar with header fields and code lists
+    :param delimiter: CSV field delimiter
+    :param skip_rows: CSV heading rows before the first catalogue line
+    :return: XML-string, see excel_to_xml for the other parameters
+    '''
+    file_format = input_format(lines_file)
+
+    digest = None
+    if deterministic or cache is not None:
+        from result_cache import content_digest
+
+        digest = content_digest(_file_digest(lines_file) + _file_digest(header_file), config_file, file_format, max_line_items,
+                                instance_identifier, creation_date_time, delimiter, skip_rows)
+
+    convert = functools.partial(_columnar_to_xml, lines_file, header_file, file_format, digest, max_line_items=max_line_items,
+                                instance_identifier=instance_identifier, creation_date_time=creation_date_time, deterministic=deterministic,
+                                integrity_check=integrity_check, fail_on_integrity_errors=fail_on_integrity_errors, delimiter=delimiter,
+                                skip_rows=skip_rows, config_file=config_file)
+    if cache is None:
+        return convert()
+
+    from result_cache import cached_conversion
+    return cached_conversion(cache, digest, convert, deterministic, instance_identifier, creation_date_time,
+                             check_integrity=integrity_check is not None or fail_on_integrity_errors)
+
+
+def _columnar_to_xml(lines_file, header_file, file_format, digest, max_line_items, instance_identifier, creation_date_time, deterministic,
+                     integrity_check, fail_on_integrity_errors, delimiter, skip_rows, config_file) -> str:
+    # Reads the header source and streams the lines into the XML, see columnar_to_xml for the parameters
+
+    header, code_lists = load_header_source(header_file, config_file)
+
+    if file_format == FORMAT_CSV:
+        lines = read_csv_lines(lines_file, delimiter=delimiter, skip_rows=skip_rows, config_file=config_file)
+    elif file_format == FORMAT_PARQUET:
+        lines = read_parquet_lines(lines_file, config_file=config_file)
+    else:
+        lines = read_arrow_lines(lines_file, config_file=config_file)
+
+    return catalogue_to_xml(header, code_lists, lines, max_line_items=max_line_items, instance_identifier=instance_identifier,
+                            creation_date_time=creation_date_time, deterministic=deterministic, digest=digest,
+                            integrity_check=integrity_check, fail_on_integrity_errors=fail_on_integrity_errors, config_file=config_file)
@@ -15,56 +15,154 @@
  */
 """
 from helper_functions import *
+import functools
 import io
-from openpyxl import load_workbook
-import configparser
-import xml.etree.ElementTree as el_tree
 import warnings
+import xml.etree.ElementTree as el_tree
+
 
+@functools.lru_cache(maxsize=None)
+def _workbook_loader():
+    # openpyxl is by far the most expensive import, so it is deferred until the first conversion
+    from openpyxl import load_workbook
 
-def excel_to_xml(excel_file, max_line_items=None) -> str:
+    # Filter warnings from openpyxl
+    warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+    return load_workbook
+
+
+def excel_to_xml(excel_file, max_line_items=None, instance_identifier=None, creation_date_time=None, deterministic=False, cache=None,
+                 integrity_check=None, fail_on_integrity_errors=False, memory_budget=None, strategy=None, config_file=CONFIG_FILE) -> str:
     '''
     Takes an excel spread sheet and transforms it into Peppol BIS Catalogue XML
     :param max_line_items: Maximum number of line items to process
     :param excel_file: file path to the file or byte-array containing the file
+    :param instance_identifier: SBDH instance identifier, a new UUID if not given (or derived from the content in deterministic mode)
+    :param creation_date_time: SBDH creation datetime, the current time if not given (or the catalogue issue date in deterministic mode)
+    :param deterministic: derive instance identifier and creation datetime from the content, so identical input gives identical output
+    :param cache: optional ResultCache/DiskResultCache (or any object with get/put), requires deterministic output
+    :param integrity_check: optional IntegrityCheck, its report lists dangling related item references and duplicate identifiers
+    :param fail_on_integrity_errors: raise ValueError if the integrity check finds any problems
+    :param memory_budget: memory budget in bytes, the planner picks a strategy that fits or raises MemoryBudgetExceeded before parsing
+    :param strategy: "in-memory" or "streaming" (read-only workbook), overrides the planner
+    :param config_file: path to the cell location config, the ExcelCellLocations.cfg next to this module by default
     :return: XML-string
     '''
+    digest = None
+    if deterministic or cache is not None:
+        from result_cache import content_digest
+
+        try:
+            if isinstance(excel_file, str):
+                with open(excel_file, "rb") as f:
+                    excel_file = f.read()
+        except OSError as e:
+            raise ValueError("Not a valid Excel file") from e
+
+        digest = content_digest(excel_file, config_file, max_line_items, instance_identifier, creation_date_time)
+
+    convert = functools.partial(_workbook_to_xml, excel_file, digest, max_line_items=max_line_items, instance_identifier=instance_identifier,
+                                creation_date_time=creation_date_time, deterministic=deterministic, integrity_check=integrity_check,
+                                fail_on_integrity_errors=fail_on_integrity_errors, memory_budget=memory_budget, strategy=strategy,
+                                config_file=config_file)
+    if cache is None:
+        return convert()
+
+    from result_cache import cached_conversion
+    return cached_conversion(cache, digest, convert, deterministic, instance_identifier, creation_date_time,
+                             check_integrity=integrity_check is not None or fail_on_integrity_errors)
+
+
+def _workbook_to_xml(excel_file, digest, max_line_items, instance_identifier, creation_date_time, deterministic, integrity_check,
+                     fail_on_integrity_errors, memory_budget, strategy, config_file) -> str:
+    # Plans, loads and converts the workbook, see excel_to_xml for the parameters
+
+    # Pick a strategy from the zip directory before any expensive parsing
+    if strategy is None and memory_budget is not None:
+        from planner import plan_conversion, MemoryBudgetExceeded
+
+        plan = plan_conversion(excel_file, memory_budget, max_line_items)
+        if plan.strategy is None:
+            raise MemoryBudgetExceeded(plan)
+        strategy = plan.strategy
+    if strategy not in (None, "in-memory", "streaming"):
+        raise ValueError(f"Unknown strategy: {strategy}")
+    read_only = strategy == "streaming"
+
+    load_workbook = _workbook_loader()
     try:
-        # Filter warnings from openpyxl
-        warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
-
         ## Load Excel workbook, test if the input is a path or a not (byte-array)
         if isinstance(excel_file, str):
-            wb = load_workbook(filename=excel_file)
+            wb = load_workbook(filename=excel_file, read_only=read_only)
         else:
-            wb = load_workbook(filename=io.BytesIO(excel_file))
+            wb = load_workbook(filename=io.BytesIO(excel_file), read_only=read_only)
     except Exception as e:
         raise ValueError("Not a valid Excel file") from e
 
 
-    # Load config parser with parameters for all business terms locations and codelists
-    config = configparser.ConfigParser()
-    config.read("ExcelCellLocations.cfg")
+    try:
+        # Load config parser with parameters for all business terms locations and codelists (cached between calls)
+        config = load_config(config_file)
+        cols = load_col_indices(config_file)
+
+        if read_only:
+            reset_read_only_dimensions(wb)
+
+        # Verify the consistency of the template (all sheets in place, all columns in correct order and so forth)
+        check_spreadsheet_consistency(wb)
+
+        # Assign the main spreadsheets to variables
+        sheet_header = wb["CatalogueHeader"]
+        sheet_lines = wb["CatalogueLines"]
+
+        # Read-only rows end at the last stored cell, so they are padded up to the last mapped column
+        max_col = max(cols.values()) + 1 if read_only else None
 
-    # Verify the consistency of the template (all sheets in place, all columns in correct order and so forth)
-    check_spreadsheet_consistency(wb)
+        # Catalogue lines start from row 3 according to the template, the loop stops at the first empty LINE_ID
+        lines = enumerate(sheet_lines.iter_rows(min_row=3, max_col=max_col, values_only=True), 3)
+        result = catalogue_to_xml(read_header(sheet_header, config), load_code_lists(wb, config), lines, max_line_items=max_line_items,
+                                  instance_identifier=instance_identifier, creation_date_time=creation_date_time, deterministic=deterministic,
+                                  digest=digest, integrity_check=integrity_check, fail_on_integrity_errors=fail_on_integrity_errors,
+                                  config_file=config_file)
+    finally:
+        # Releases the zip handle a read-only workbook keeps open
+        if read_only:
+            wb.close()
 
-    # Assign the main spreadsheets to variables
-    sheet_header = wb["CatalogueHeader"]
-    sheet_lines = wb["CatalogueLines"]
+    return result
 
-    # Create Codelists objects from the codelists in the spreadsheet
-    country_codes = load_code_list(wb, cl_range(config, "LIST_COUNTRY_CODE"))
-    price_type_codes = load_code_list(wb, cl_range(config, "LIST_PRICE_TYPE"))
-    vat_codes = load_code_list(wb, cl_range(config, "LIST_VAT_CODE"))
-    unit_codes = load_code_list(wb, cl_range(config, "LIST_UNIT_CODE"))
-    item_classification_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_CLASSIFICATION_CODE"))
-    item_property_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_PROPERTY_CODE"))
-    item_attribute_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_ATTRIBUTE_CODE"))
-    item_measure_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_MEASURE_CODE"))
-    item_certificate_env_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_CERTIFICATE_ENV_CODE"))
-    item_certificate_nutr_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_CERTIFICATE_NUTR_CODE"))
-    item_availability_codes = load_code_list(wb, cl_range(config, "LIST_ITEM_AVAILABILITY_CODE"))
+
+def catalogue_to_xml(header, code_lists, lines, max_line_items=None, instance_identifier=None, creation_date_time=None, deterministic=False,
+                     digest=None, integrity_check=None, fail_on_integrity_errors=False, config_file=CONFIG_FILE) -> str:
+    '''
+    Generates the Peppol BIS Catalogue XML from already read template data, shared by the Excel and columnar inputs
+    :param header: header values by [HeaderCell] name
+    :param code_lists: code lists by [CodeLists] name
+    :param lines: iterable of (row number, row values), values indexed by [LineColIndex]
+    :param digest: content hash of the input, required in deterministic mode
+    :return: XML-string, see excel_to_xml for the other parameters
+    '''
+    if deterministic and digest is None:
+        raise ValueError("Deterministic mode requires a content digest of the input.")
+
+    cols = load_col_indices(config_file)
+
+    if fail_on_integrity_errors and integrity_check is None:
+        from integrity import IntegrityCheck
+        integrity_check = IntegrityCheck()
+
+    # Codelists read from the spreadsheet (or a sidecar), missing lists are treated as empty
+    country_codes = code_lists.get("LIST_COUNTRY_CODE", {})
+    price_type_codes = code_lists.get("LIST_PRICE_TYPE", {})
+    vat_codes = code_lists.get("LIST_VAT_CODE", {})
+    unit_codes = code_lists.get("LIST_UNIT_CODE", {})
+    item_classification_codes = code_lists.get("LIST_ITEM_CLASSIFICATION_CODE", {})
+    item_property_codes = code_lists.get("LIST_ITEM_PROPERTY_CODE", {})
+    item_attribute_codes = code_lists.get("LIST_ITEM_ATTRIBUTE_CODE", {})
+    item_measure_codes = code_lists.get("LIST_ITEM_MEASURE_CODE", {})
+    item_certificate_env_codes = code_lists.get("LIST_ITEM_CERTIFICATE_ENV_CODE", {})
+    item_certificate_nutr_codes = code_lists.get("LIST_ITEM_CERTIFICATE_NUTR_CODE", {})
+    item_availability_codes = code_lists.get("LIST_ITEM_AVAILABILITY_CODE", {})
 
     # Create root element with namespaces
     root = el_tree.Element("Catalogue")
@@ -75,81 +173,81 @@ def excel_to_xml(excel_file, max_line_items=None) -> str:
     # Header Information
     add_element(el_tree, root, "cbc:CustomizationID", "urn:fdc:peppol.eu:poacc:trns:catalogue:3")
     add_element(el_tree, root, "cbc:ProfileID", "urn:fdc:peppol.eu:poacc:bis:catalogue_wo_response:3")
-    add_element(el_tree, root, "cbc:ID", str(sheet_header[header_cell(config, "CATALOGUE_ID")].value))
-    add_element(el_tree, root, "cbc:ActionCode", str(sheet_header[header_cell(config, "ACTIONCODE")].value))
-    add_element(el_tree, root, "cbc:Name", str(sheet_header[header_cell(config, "CATALOGUE_NAME")].value))
-    add_element(el_tree, root, "cbc:IssueDate", str(sheet_header[header_cell(config, "CATALOGUE_ISSUEDATE")].value).split(" ")[0])
+    add_element(el_tree, root, "cbc:ID", str(header["CATALOGUE_ID"]))
+    add_element(el_tree, root, "cbc:ActionCode", str(header["ACTIONCODE"]))
+    add_element(el_tree, root, "cbc:Name", str(header["CATALOGUE_NAME"]))
+    add_element(el_tree, root, "cbc:IssueDate", str(header["CATALOGUE_ISSUEDATE"]).split(" ")[0])
 
-    currency_id = str(sheet_header[header_cell(config, "CURRENCY_ID")].value)
+    currency_id = str(header["CURRENCY_ID"])
 
     # Validity
-    if not is_cell_empty(str(sheet_header[header_cell(config, "CATALOGUE_STARTDATE")].value)) or not is_cell_empty(str(sheet_header[header_cell(config, "CATALOGUE_ENDDATE")].value)):
+    if not is_cell_empty(str(header["CATALOGUE_STARTDATE"])) or not is_cell_empty(str(header["CATALOGUE_ENDDATE"])):
         cac = el_tree.SubElement(root, "cac:ValidityPeriod")
-        add_element(el_tree, cac, "cbc:StartDate", str(sheet_header[header_cell(config, "CATALOGUE_STARTDATE")].value).split(" ")[0])
-        add_element(el_tree, cac, "cbc:EndDate", str(sheet_header[header_cell(config, "CATALOGUE_ENDDATE")].value).split(" ")[0])
+        add_element(el_tree, cac, "cbc:StartDate", str(header["CATALOGUE_STARTDATE"]).split(" ")[0])
+        add_element(el_tree, cac, "cbc:EndDate", str(header["CATALOGUE_ENDDATE"]).split(" ")[0])
 
     # Referenced contract
-    if not is_cell_empty(str(sheet_header[header_cell(config, "REFERENCED_CONTRACT_ID")].value)):
+    if not is_cell_empty(str(header["REFERENCED_CONTRACT_ID"])):
         cac = el_tree.SubElement(root, "cac:ReferencedContract")
-        add_element(el_tree, cac, "cbc:ID", str(sheet_header[header_cell(config, "REFERENCED_CONTRACT_ID")].value))
+        add_element(el_tree, cac, "cbc:ID", str(header["REFERENCED_CONTRACT_ID"]))
 
     # Previous catalogue (source catalogue)
-    if not is_cell_empty(str(sheet_header[header_cell(config, "PREVIOUS_CATALOGUE_ID")].value)):
+    if not is_cell_empty(str(header["PREVIOUS_CATALOGUE_ID"])):
         cac = el_tree.SubElement(root, "cac:SourceCatalogueReference")
-        add_element(el_tree, cac, "cbc:ID", str(sheet_header[header_cell(config, "PREVIOUS_CATALOGUE_ID")].value))
+        add_element(el_tree, cac, "cbc:ID", str(header["PREVIOUS_CATALOGUE_ID"]))
 
     # PROVIDER Supplier party - sender
     cac = el_tree.SubElement(root, "cac:ProviderParty")
-    c = add_element(el_tree, cac, "cbc:EndpointID", str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_ENDPOINT_ID")].value))
-    add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_ENDPOINT_ID_SCHEMEID")].value))
+    c = add_element(el_tree, cac, "cbc:EndpointID", str(header["PROVIDER_SUPPLIER_ENDPOINT_ID"]))
+    add_attribute(c, "schemeID", str(header["PROVIDER_SUPPLIER_ENDPOINT_ID_SCHEMEID"]))
     cac1 = el_tree.SubElement(cac, "cac:PartyIdentification")
-    c = add_element(el_tree, cac1, "cbc:ID", str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_PARTY_ID")].value))
-    add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_PARTY_ID_SCHEMEID")].value))
+    c = add_element(el_tree, cac1, "cbc:ID", str(header["PROVIDER_SUPPLIER_PARTY_ID"]))
+    add_attribute(c, "schemeID", str(header["PROVIDER_SUPPLIER_PARTY_ID_SCHEMEID"]))
     c = el_tree.SubElement(cac, "cac:PartyLegalEntity")
-    add_element(el_tree, c, "cbc:RegistrationName", str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_NAME")].value))
+    add_element(el_tree, c, "cbc:RegistrationName", str(header["PROVIDER_SUPPLIER_NAME"]))
 
     # RECEIVER Buyer party - receiver
     cac = el_tree.SubElement(root, "cac:ReceiverParty")
-    c = add_element(el_tree, cac, "cbc:EndpointID", str(sheet_header[header_cell(config, "RECEIVER_BUYER_ENDPOINT_ID")].value))
-    add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "RECEIVER_BUYER_ENDPOINT_ID_SCHEMEID")].value))
+    c = add_element(el_tree, cac, "cbc:EndpointID", str(header["RECEIVER_BUYER_ENDPOINT_ID"]))
+    add_attribute(c, "schemeID", str(header["RECEIVER_BUYER_ENDPOINT_ID_SCHEMEID"]))
     cac1 = el_tree.SubElement(cac, "cac:PartyIdentification")
-    c = add_element(el_tree, cac1, "cbc:ID", str(sheet_header[header_cell(config, "RECEIVER_BUYER_PARTY_ID")].value))
-    add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "RECEIVER_BUYER_PARTY_ID_SCHEMEID")].value))
+    c = add_element(el_tree, cac1, "cbc:ID", str(header["RECEIVER_BUYER_PARTY_ID"]))
+    add_attribute(c, "schemeID", str(header["RECEIVER_BUYER_PARTY_ID_SCHEMEID"]))
     c = el_tree.SubElement(cac, "cac:PartyLegalEntity")
-    add_element(el_tree, c, "cbc:RegistrationName", str(sheet_header[header_cell(config, "RECEIVER_BUYER_NAME")].value))
+    add_element(el_tree, c, "cbc:RegistrationName", str(header["RECEIVER_BUYER_NAME"]))
 
     # Supplier party
-    if not is_cell_empty(str(sheet_header[header_cell(config, "SUPPLIER_NAME")].value)):
+    if not is_cell_empty(str(header["SUPPLIER_NAME"])):
         cac = el_tree.SubElement(root, "cac:SellerSupplierParty")
         cac = el_tree.SubElement(cac, "cac:Party")
-        c = add_element(el_tree, cac, "cbc:EndpointID", str(sheet_header[header_cell(config, "SUPPLIER_ENDPOINT_ID")].value))
-        add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "SUPPLIER_ENDPOINT_ID_SCHEMEID")].value))
+        c = add_element(el_tree, cac, "cbc:EndpointID", str(header["SUPPLIER_ENDPOINT_ID"]))
+        add_attribute(c, "schemeID", str(header["SUPPLIER_ENDPOINT_ID_SCHEMEID"]))
         cac1 = el_tree.SubElement(cac, "cac:PartyIdentification")
-        c = add_element(el_tree, cac1, "cbc:ID", str(sheet_header[header_cell(config, "SUPPLIER_PARTY_ID")].value))
-        add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "SUPPLIER_PARTY_ID_SCHEMEID")].value))
+        c = add_element(el_tree, cac1, "cbc:ID", str(header["SUPPLIER_PARTY_ID"]))
+        add_attribute(c, "schemeID", str(header["SUPPLIER_PARTY_ID_SCHEMEID"]))
         c = el_tree.SubElement(cac, "cac:PartyName")
-        add_element(el_tree, c, "cbc:Name", str(sheet_header[header_cell(config, "SUPPLIER_NAME")].value))
+        add_element(el_tree, c, "cbc:Name", str(header["SUPPLIER_NAME"]))
 
     # Buyer party
-    if not is_cell_empty(str(sheet_header[header_cell(config, "BUYER_NAME")].value)):
+    if not is_cell_empty(str(header["BUYER_NAME"])):
         cac = el_tree.SubElement(root, "cac:ContractorCustomerParty")
         cac = el_tree.SubElement(cac, "cac:Party")
-        c = add_element(el_tree, cac, "cbc:EndpointID", str(sheet_header[header_cell(config, "BUYER_ENDPOINT_ID")].value))
-        add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "BUYER_ENDPOINT_ID_SCHEMEID")].value))
+        c = add_element(el_tree, cac, "cbc:EndpointID", str(header["BUYER_ENDPOINT_ID"]))
+        add_attribute(c, "schemeID", str(header["BUYER_ENDPOINT_ID_SCHEMEID"]))
         cac1 = el_tree.SubElement(cac, "cac:PartyIdentification")
-        c = add_element(el_tree, cac1, "cbc:ID", str(sheet_header[header_cell(config, "BUYER_PARTY_ID")].value))
-        add_attribute(c, "schemeID", str(sheet_header[header_cell(config, "BUYER_PARTY_ID_SCHEMEID")].value))
+        c = add_element(el_tree, cac1, "cbc:ID", str(header["BUYER_PARTY_ID"]))
+        add_attribute(c, "schemeID", str(header["BUYER_PARTY_ID_SCHEMEID"]))
         c = el_tree.SubElement(cac, "cac:PartyName")
-        add_element(el_tree, c, "cbc:Name", str(sheet_header[header_cell(config, "BUYER_NAME")].value))
+        add_element(el_tree, c, "cbc:Name", str(header["BUYER_NAME"]))
 
     processed_lines = 0
-    # Loop through rows in the CatalogueLine sheet starting from row 3 according to the template
-    for row in sheet_lines.iter_rows(min_row=3, max_row=sheet_lines.max_row):
+    # Loop through the catalogue lines, (row number, values) in the column order of the SFTI template
+    for row_number, row in lines:
 
         # if no line number, then assume an empty or incomplete row and exit the loop.
-        if row[col_index(config, "LINE_ID")].value is None:
+        if row[cols["LINE_ID"]] is None:
             break
-        elif str(row[col_index(config, "LINE_ID")].value).lower == "x":
+        elif str(row[cols["LINE_ID"]]).lower == "x":
             # In case the line number cell is x, then skip the line and continue with next
             continue
 
@@ -159,384 +257,416 @@ def excel_to_xml(excel_file, max_line_items=None) -> str:
             if processed_lines > max_line_items:
                 break
 
+        # ;-separated related item IDs, split once so that the XML and the integrity check get the same values
+        related_items = {field: separated_string(str(row[cols[field]])) if not is_cell_empty(str(row[cols[field]])) else []
+                         for field in ("COMPREL2_ITEM_ID", "ASSOCREL_ITEM_ID", "REQUIREDREL_ITEM_ID")}
+
+        # Index identifiers and related item references, resolved once all lines have been read
+        if integrity_check is not None:
+            for field in integrity_check.UNIQUE_FIELDS:
+                if not is_cell_empty(str(row[cols[field]])):
+                    integrity_check.add_identifier(field, str(row[cols[field]]), row_number)
+            for field, element, is_list in integrity_check.REFERENCE_FIELDS:
+                if is_list:
+                    references = related_items[field]
+                else:
+                    references = [] if is_cell_empty(str(row[cols[field]])) else [str(row[cols[field]])]
+                for reference in references:
+                    integrity_check.add_reference(element, reference, row_number, row[cols["LINE_ID"]])
+
         cac_CatalogueLine = el_tree.SubElement(root, "cac:CatalogueLine")
 
         # Sub-elements under cac:CatalogueLine
-        add_element(el_tree, cac_CatalogueLine, "cbc:ID", str(row[col_index(config, "LINE_ID")].value))
+        add_element(el_tree, cac_CatalogueLine, "cbc:ID", str(row[cols["LINE_ID"]]))
         add_element(el_tree, cac_CatalogueLine, "cbc:ActionCode", "Add")
 
         # if OrderableIndicator is empty in the spread sheet, then set value true
-        add_element(el_tree, cac_CatalogueLine, "cbc:OrderableIndicator", "false" if str(row[col_index(config, "ORDERABLEINDICATOR")].value).lower() == "nej" else "true")
-        add_element(el_tree, cac_CatalogueLine, "cbc:OrderableUnit", get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes))
+        add_element(el_tree, cac_CatalogueLine, "cbc:OrderableIndicator", "false" if str(row[cols["ORDERABLEINDICATOR"]]).lower() == "nej" else "true")
+        add_element(el_tree, cac_CatalogueLine, "cbc:OrderableUnit", get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes))
 
-        c = add_element(el_tree, cac_CatalogueLine, "cbc:ContentUnitQuantity", str(row[col_index(config, "CONTENTUNITQUANTITY")].value))
-        add_attribute(c, "unitCode", get_code(str(row[col_index(config, "CONTENTUNITQUANTITY_CODE")].value), unit_codes))
+        c = add_element(el_tree, cac_CatalogueLine, "cbc:ContentUnitQuantity", str(row[cols["CONTENTUNITQUANTITY"]]))
+        add_attribute(c, "unitCode", get_code(str(row[cols["CONTENTUNITQUANTITY_CODE"]]), unit_codes))
 
-        add_element(el_tree, cac_CatalogueLine, "cbc:OrderQuantityIncrementNumeric", str(row[col_index(config, "ORDERQUANTITYINCREMENTNUMERIC")].value))
+        add_element(el_tree, cac_CatalogueLine, "cbc:OrderQuantityIncrementNumeric", str(row[cols["ORDERQUANTITYINCREMENTNUMERIC"]]))
 
         c = add_element(el_tree, cac_CatalogueLine, "cbc:MinimumOrderQuantity",
-                        str(row[col_index(config, "MINIMUMORDERQUANTITY")].value))
-        add_attribute(c, "unitCode", get_code(str(row[col_index(config, "ORDERABLEUNIT")].value), unit_codes))
+                        str(row[cols["MINIMUMORDERQUANTITY"]]))
+        add_attribute(c, "unitCode", get_code(str(row[cols["ORDERABLEUNIT"]]), unit_codes))
 
-        add_element(el_tree, cac_CatalogueLine, "cbc:PackLevelCode", str(row[col_index(config, "PACKLEVELCODE")].value))
+        add_element(el_tree, cac_CatalogueLine, "cbc:PackLevelCode", str(row[cols["PACKLEVELCODE"]]))
 
-        if not is_cell_empty(str(row[col_index(config, "LINE_VALIDITY_STARTDATE")].value)) or not is_cell_empty(str(row[col_index(config, "LINE_VALIDITY_ENDDATE")].value)):
+        if not is_cell_empty(str(row[cols["LINE_VALIDITY_STARTDATE"]])) or not is_cell_empty(str(row[cols["LINE_VALIDITY_ENDDATE"]])):
             cac = el_tree.SubElement(cac_CatalogueLine, "cac:LineValidityPeriod")
-            add_element(el_tree, cac, "cbc:StartDate", str(row[col_index(config, "LINE_VALIDITY_STARTDATE")].value).split(" ")[0])
-            add_element(el_tree, cac, "cbc:EndDate", str(row[col_index(config, "LINE_VALIDITY_ENDDATE")].value).split(" ")[0])
+            add_element(el_tree, cac, "cbc:StartDate", str(row[cols["LINE_VALIDITY_STARTDATE"]]).split(" ")[0])
+            add_element(el_tree, cac, "cbc:EndDate", str(row[cols["LINE_VALIDITY_ENDDATE"]]).split(" ")[0])
 
-        if not is_cell_empty(str(row[col_index(config, "ITEMCOM_PRICEAMOUNT")].value)) or not is_cell_empty(str(row[col_index(config, "ITEMCOM_QUANTITY")].value)):
+        if not is_cell_empty(str(row[cols["ITEMCOM_PRICEAMOUNT"]])) or not is_cell_empty(str(row[cols["ITEMCOM_QUANTITY"]])):
             cac = el_tree.SubElement(cac_CatalogueLine, "cac:ItemComparison")
-            c = add_element(el_tree, cac, "cbc:PriceAmount", str(row[col_index(config, "ITEMCOM_PRICEAMOUNT")].value))
+            c = add_element(el_tree, cac, "cbc:PriceAmount", str(row[cols["ITEMCOM_PRICEAMOUNT"]]))
             add_attribute(c, "currencyID", currency_id)
-            c = add_element(el_tree, cac, "cbc:Quantity", str(row[col_index(config, "ITEMCOM_QUANTITY")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "ITEMCOM_QUANTITY_CODE")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Quantity", str(row[cols["ITEMCOM_QUANTITY"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["ITEMCOM_QUANTITY_CODE"]]), unit_codes))
+
+        if not is_cell_empty(str(row[cols["COMPREL_ITEM_ID"]])):
+            cac = el_tree.SubElement(cac_CatalogueLine, "cac:ComponentRelatedItem")
+            add_element(el_tree, cac, "cbc:ID", str(row[cols["COMPREL_ITEM_ID"]]))
+            c = add_element(el_tree, cac, "cbc:Quantity", str(row[cols["COMPREL_ITEM_QUANTITY"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["COMPREL_ITEM_QUANTITY_CODE"]]), unit_codes))
 
-        if not is_cell_empty(str(row[col_index(config, "COMPREL_ITEM_ID")].value)):
+        for value in related_items["COMPREL2_ITEM_ID"]:
             cac = el_tree.SubElement(cac_CatalogueLine, "cac:ComponentRelatedItem")
-            add_element(el_tree, cac, "cbc:ID", str(row[col_index(config, "COMPREL_ITEM_ID")].value))
-            c = add_element(el_tree, cac, "cbc:Quantity", str(row[col_index(config, "COMPREL_ITEM_QUANTITY")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "COMPREL_ITEM_QUANTITY_CODE")].value), unit_codes))
-
-        if not is_cell_empty(str(row[col_index(config, "COMPREL2_ITEM_ID")].value)):
-            for value in separated_string(str(row[col_index(config, "COMPREL2_ITEM_ID")].value)):
-                cac = el_tree.SubElement(cac_CatalogueLine, "cac:ComponentRelatedItem")
-                add_element(el_tree, cac, "cbc:ID", value)
-
-        if not is_cell_empty(str(row[col_index(config, "ASSOCREL_ITEM_ID")].value)):
-            for value in separated_string(str(row[col_index(config, "ASSOCREL_ITEM_ID")].value)):
-                cac = el_tree.SubElement(cac_CatalogueLine, "cac:AccessoryRelatedItem")
-                add_element(el_tree, cac, "cbc:ID", value)
-
-        if not is_cell_empty(str(row[col_index(config, "REQUIREDREL_ITEM_ID")].value)):
-            for value in separated_string(str(row[col_index(config, "REQUIREDREL_ITEM_ID")].value)):
-                cac = el_tree.SubElement(cac_CatalogueLine, "cac:RequiredRelatedItem")
-                add_element(el_tree, cac, "cbc:ID", value)
-
-        if not is_cell_empty(str(row[col_index(config, "REPLACEDREL_ITEM_ID")].value)):
+            add_element(el_tree, cac, "cbc:ID", value)
+
+        for value in related_items["ASSOCREL_ITEM_ID"]:
+            cac = el_tree.SubElement(cac_CatalogueLine, "cac:AccessoryRelatedItem")
+            add_element(el_tree, cac, "cbc:ID", value)
+
+        for value in related_items["REQUIREDREL_ITEM_ID"]:
+            cac = el_tree.SubElement(cac_CatalogueLine, "cac:RequiredRelatedItem")
+            add_element(el_tree, cac, "cbc:ID", value)
+
+        if not is_cell_empty(str(row[cols["REPLACEDREL_ITEM_ID"]])):
             cac = el_tree.SubElement(cac_CatalogueLine, "cac:ReplacedRelatedItem")
-            add_element(el_tree, cac, "cbc:ID", str(row[col_index(config, "REPLACEDREL_ITEM_ID")].value))
+            add_element(el_tree, cac, "cbc:ID", str(row[cols["REPLACEDREL_ITEM_ID"]]))
 
-        if not is_cell_empty(str(row[col_index(config, "PRICEAMOUNT")].value)):
-            add_price(el_tree, cac_CatalogueLine, "", "", str(row[col_index(config, "PRICEAMOUNT")].value), currency_id, str(row[col_index(config, "BASEQUANTITY")].value)
-                      , get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes), get_code(str(row[col_index(config, "PRICETYPE")].value), price_type_codes)
-                      , str(row[col_index(config, "PRICE_STARTDATE")].value), str(row[col_index(config, "PRICE_ENDDATE")].value), str(row[col_index(config, "LEADTIMEMEASURE")].value))
+        if not is_cell_empty(str(row[cols["PRICEAMOUNT"]])):
+            add_price(el_tree, cac_CatalogueLine, "", "", str(row[cols["PRICEAMOUNT"]]), currency_id, str(row[cols["BASEQUANTITY"]])
+                      , get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes), get_code(str(row[cols["PRICETYPE"]]), price_type_codes)
+                      , str(row[cols["PRICE_STARTDATE"]]), str(row[cols["PRICE_ENDDATE"]]), str(row[cols["LEADTIMEMEASURE"]]))
 
         # If more than one price tier
-        if not is_cell_empty(str(row[col_index(config, "PRICEAMOUNT_TIER1")].value)):
-            add_price(el_tree, cac_CatalogueLine, str(row[col_index(config, "MINIMUMQUANTITY_TIER1")].value), get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes)
-                      , str(row[col_index(config, "PRICEAMOUNT_TIER1")].value), currency_id, str(row[col_index(config, "BASEQUANTITY")].value)
-                      , get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes), get_code(str(row[col_index(config, "PRICETYPE")].value), price_type_codes)
-                      , str(row[col_index(config, "PRICE_STARTDATE")].value), str(row[col_index(config, "PRICE_ENDDATE")].value), str(row[col_index(config, "LEADTIMEMEASURE")].value))
+        if not is_cell_empty(str(row[cols["PRICEAMOUNT_TIER1"]])):
+            add_price(el_tree, cac_CatalogueLine, str(row[cols["MINIMUMQUANTITY_TIER1"]]), get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes)
+                      , str(row[cols["PRICEAMOUNT_TIER1"]]), currency_id, str(row[cols["BASEQUANTITY"]])
+                      , get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes), get_code(str(row[cols["PRICETYPE"]]), price_type_codes)
+                      , str(row[cols["PRICE_STARTDATE"]]), str(row[cols["PRICE_ENDDATE"]]), str(row[cols["LEADTIMEMEASURE"]]))
 
         # TIER 2
-        if not is_cell_empty(str(row[col_index(config, "PRICEAMOUNT_TIER2")].value)):
-            add_price(el_tree, cac_CatalogueLine, str(row[col_index(config, "MINIMUMQUANTITY_TIER2")].value), get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes)
-                      , str(row[col_index(config, "PRICEAMOUNT_TIER2")].value), currency_id, str(row[col_index(config, "BASEQUANTITY")].value)
-                      , get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes), get_code(str(row[col_index(config, "PRICETYPE")].value), price_type_codes)
-                      , str(row[col_index(config, "PRICE_STARTDATE")].value), str(row[col_index(config, "PRICE_ENDDATE")].value), str(row[col_index(config, "LEADTIMEMEASURE")].value))
+        if not is_cell_empty(str(row[cols["PRICEAMOUNT_TIER2"]])):
+            add_price(el_tree, cac_CatalogueLine, str(row[cols["MINIMUMQUANTITY_TIER2"]]), get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes)
+                      , str(row[cols["PRICEAMOUNT_TIER2"]]), currency_id, str(row[cols["BASEQUANTITY"]])
+                      , get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes), get_code(str(row[cols["PRICETYPE"]]), price_type_codes)
+                      , str(row[cols["PRICE_STARTDATE"]]), str(row[cols["PRICE_ENDDATE"]]), str(row[cols["LEADTIMEMEASURE"]]))
 
         # TIER 3
-        if not is_cell_empty(str(row[col_index(config, "PRICEAMOUNT_TIER3")].value)):
-            add_price(el_tree, cac_CatalogueLine, str(row[col_index(config, "MINIMUMQUANTITY_TIER3")].value), get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes)
-                      , str(row[col_index(config, "PRICEAMOUNT_TIER3")].value), currency_id, str(row[col_index(config, "BASEQUANTITY")].value)
-                      , get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes), get_code(str(row[col_index(config, "PRICETYPE")].value), price_type_codes)
-                      , str(row[col_index(config, "PRICE_STARTDATE")].value), str(row[col_index(config, "PRICE_ENDDATE")].value), str(row[col_index(config, "LEADTIMEMEASURE")].value))
+        if not is_cell_empty(str(row[cols["PRICEAMOUNT_TIER3"]])):
+            add_price(el_tree, cac_CatalogueLine, str(row[cols["MINIMUMQUANTITY_TIER3"]]), get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes)
+                      , str(row[cols["PRICEAMOUNT_TIER3"]]), currency_id, str(row[cols["BASEQUANTITY"]])
+                      , get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes), get_code(str(row[cols["PRICETYPE"]]), price_type_codes)
+                      , str(row[cols["PRICE_STARTDATE"]]), str(row[cols["PRICE_ENDDATE"]]), str(row[cols["LEADTIMEMEASURE"]]))
 
         #  TIER 4
-        if not is_cell_empty(str(row[col_index(config, "PRICEAMOUNT_TIER4")].value)):
-            add_price(el_tree, cac_CatalogueLine, str(row[col_index(config, "MINIMUMQUANTITY_TIER4")].value), get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes)
-                      , str(row[col_index(config, "PRICEAMOUNT_TIER4")].value), currency_id, str(row[col_index(config, "BASEQUANTITY")].value)
-                      , get_code(str(row[col_index(config, "BASEQUANTITY_CODE")].value), unit_codes), get_code(str(row[col_index(config, "PRICETYPE")].value), price_type_codes)
-                      , str(row[col_index(config, "PRICE_STARTDATE")].value), str(row[col_index(config, "PRICE_ENDDATE")].value), str(row[col_index(config, "LEADTIMEMEASURE")].value))
+        if not is_cell_empty(str(row[cols["PRICEAMOUNT_TIER4"]])):
+            add_price(el_tree, cac_CatalogueLine, str(row[cols["MINIMUMQUANTITY_TIER4"]]), get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes)
+                      , str(row[cols["PRICEAMOUNT_TIER4"]]), currency_id, str(row[cols["BASEQUANTITY"]])
+                      , get_code(str(row[cols["BASEQUANTITY_CODE"]]), unit_codes), get_code(str(row[cols["PRICETYPE"]]), price_type_codes)
+                      , str(row[cols["PRICE_STARTDATE"]]), str(row[cols["PRICE_ENDDATE"]]), str(row[cols["LEADTIMEMEASURE"]]))
 
         # Item element
         item = el_tree.SubElement(cac_CatalogueLine, "cac:Item")
-        add_element(el_tree, item, "cbc:Description", str(row[col_index(config, "ITEM_DESCRIPTION")].value))
-        c = add_element(el_tree, item, "cbc:PackQuantity", str(row[col_index(config, "ITEM_PACKQUANTITY")].value))
-        add_attribute(c, "unitCode", get_code(str(row[col_index(config, "ITEM_PACKQUANTITY_CODE")].value), unit_codes))
-        add_element(el_tree, item, "cbc:PackSizeNumeric", str(row[col_index(config, "ITEM_PACKSIZENUMERIC")].value))
-        add_element(el_tree, item, "cbc:Name", str(row[col_index(config, "ITEM_NAME")].value))
-        add_element(el_tree, item, "cbc:Keyword", str(row[col_index(config, "ITEM_KEYWORD")].value))
-        add_element(el_tree, item, "cbc:BrandName", str(row[col_index(config, "ITEM_BRANDNAME")].value))
-
-        if not is_cell_empty(str(row[col_index(config, "SELLERSITEMIDENTIFICATION_ID")].value)):
+        add_element(el_tree, item, "cbc:Description", str(row[cols["ITEM_DESCRIPTION"]]))
+        c = add_element(el_tree, item, "cbc:PackQuantity", str(row[cols["ITEM_PACKQUANTITY"]]))
+        add_attribute(c, "unitCode", get_code(str(row[cols["ITEM_PACKQUANTITY_CODE"]]), unit_codes))
+        add_element(el_tree, item, "cbc:PackSizeNumeric", str(row[cols["ITEM_PACKSIZENUMERIC"]]))
+        add_element(el_tree, item, "cbc:Name", str(row[cols["ITEM_NAME"]]))
+        add_element(el_tree, item, "cbc:Keyword", str(row[cols["ITEM_KEYWORD"]]))
+        add_element(el_tree, item, "cbc:BrandName", str(row[cols["ITEM_BRANDNAME"]]))
+
+        if not is_cell_empty(str(row[cols["SELLERSITEMIDENTIFICATION_ID"]])):
             cac = el_tree.SubElement(item, "cac:SellersItemIdentification")
-            add_element(el_tree, cac, "cbc:ID", str(row[col_index(config, "SELLERSITEMIDENTIFICATION_ID")].value))
+            add_element(el_tree, cac, "cbc:ID", str(row[cols["SELLERSITEMIDENTIFICATION_ID"]]))
 
-        if not is_cell_empty(str(row[col_index(config, "MANUFACTURERSITEMIDENTIFICATION_ID")].value)):
+        if not is_cell_empty(str(row[cols["MANUFACTURERSITEMIDENTIFICATION_ID"]])):
             cac = el_tree.SubElement(item, "cac:ManufacturersItemIdentification")
-            add_element(el_tree, cac, "cbc:ID", str(row[col_index(config, "MANUFACTURERSITEMIDENTIFICATION_ID")].value))
+            add_element(el_tree, cac, "cbc:ID", str(row[cols["MANUFACTURERSITEMIDENTIFICATION_ID"]]))
 
-        if not is_cell_empty(str(row[col_index(config, "STANDARDITEMIDENTIFICATION_ID")].value)):
+        if not is_cell_empty(str(row[cols["STANDARDITEMIDENTIFICATION_ID"]])):
             cac = el_tree.SubElement(item, "cac:StandardItemIdentification")
-            c = add_element(el_tree, cac, "cbc:ID", str(row[col_index(config, "STANDARDITEMIDENTIFICATION_ID")].value))
+            c = add_element(el_tree, cac, "cbc:ID", str(row[cols["STANDARDITEMIDENTIFICATION_ID"]]))
             add_attribute(c, "schemeID", "0160")  # Only GTIN
 
         # Product info link
-        if not is_cell_empty(str(row[col_index(config, "ITEMSPECIFICATION_EXTERNAL_URI")].value)):
+        if not is_cell_empty(str(row[cols["ITEMSPECIFICATION_EXTERNAL_URI"]])):
             cac = el_tree.SubElement(item, "cac:ItemSpecificationDocumentReference")
             add_element(el_tree, cac, "cbc:ID", "NA")
             add_element(el_tree, cac, "cbc:DocumentTypeCode", "TRADE_ITEM_DESCRIPTION")
             cac1 = el_tree.SubElement(cac, "cac:Attachment")
             cac2 = el_tree.SubElement(cac1, "cac:ExternalReference")
-            add_element(el_tree, cac2, "cbc:URI", str(row[col_index(config, "ITEMSPECIFICATION_EXTERNAL_URI")].value))
+            add_element(el_tree, cac2, "cbc:URI", str(row[cols["ITEMSPECIFICATION_EXTERNAL_URI"]]))
 
         # Product Image link
-        if not is_cell_empty(str(row[col_index(config, "ITEMSPECIFICATION_PRODUCT_IMAGE_URI")].value)):
+        if not is_cell_empty(str(row[cols["ITEMSPECIFICATION_PRODUCT_IMAGE_URI"]])):
             cac = el_tree.SubElement(item, "cac:ItemSpecificationDocumentReference")
             add_element(el_tree, cac, "cbc:ID", "NA")
             add_element(el_tree, cac, "cbc:DocumentTypeCode", "PRODUCT_IMAGE")
             cac1 = el_tree.SubElement(cac, "cac:Attachment")
             cac2 = el_tree.SubElement(cac1, "cac:ExternalReference")
-            add_element(el_tree, cac2, "cbc:URI", str(row[col_index(config, "ITEMSPECIFICATION_PRODUCT_IMAGE_URI")].value))
+            add_element(el_tree, cac2, "cbc:URI", str(row[cols["ITEMSPECIFICATION_PRODUCT_IMAGE_URI"]]))
 
         # Origin country
-        if not is_cell_empty(str(row[col_index(config, "ORIGIN_COUNTRY_CODE")].value)):
+        if not is_cell_empty(str(row[cols["ORIGIN_COUNTRY_CODE"]])):
             cac = el_tree.SubElement(item, "cac:OriginCountry")
-            if len(str(row[col_index(config, "ORIGIN_COUNTRY_CODE")].value)) == 2:
-                add_element(el_tree, cac, "cbc:IdentificationCode", str(row[col_index(config, "ORIGIN_COUNTRY_CODE")].value))
+            if len(str(row[cols["ORIGIN_COUNTRY_CODE"]])) == 2:
+                add_element(el_tree, cac, "cbc:IdentificationCode", str(row[cols["ORIGIN_COUNTRY_CODE"]]))
             else:
-                add_element(el_tree, cac, "cbc:IdentificationCode", get_code(str(row[col_index(config, "ORIGIN_COUNTRY_CODE")].value), country_codes))
+                add_element(el_tree, cac, "cbc:IdentificationCode", get_code(str(row[cols["ORIGIN_COUNTRY_CODE"]]), country_codes))
 
         # Varugrupp SSU
-        if not is_cell_empty(str(row[col_index(config, "ITEMCLASSIFICATIONCODE_SSU")].value)):
+        if not is_cell_empty(str(row[cols["ITEMCLASSIFICATIONCODE_SSU"]])):
             cac = el_tree.SubElement(item, "cac:CommodityClassification")
-            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[col_index(config, "ITEMCLASSIFICATIONCODE_SSU")].value))
+            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[cols["ITEMCLASSIFICATIONCODE_SSU"]]))
             add_attribute(c, "listID", "SSU")
-            add_attribute(c, "name", str(row[col_index(config, "ITEMCLASSIFICATION_VARUGRUPP_DESC")].value))
+            add_attribute(c, "name", str(row[cols["ITEMCLASSIFICATION_VARUGRUPP_DESC"]]))
 
         # Varugrupp UNCSP
-        if not is_cell_empty(str(row[col_index(config, "ITEMCLASSIFICATIONCODE_UNSPSC")].value)):
+        if not is_cell_empty(str(row[cols["ITEMCLASSIFICATIONCODE_UNSPSC"]])):
             cac = el_tree.SubElement(item, "cac:CommodityClassification")
-            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[col_index(config, "ITEMCLASSIFICATIONCODE_UNSPSC")].value))
+            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[cols["ITEMCLASSIFICATIONCODE_UNSPSC"]]))
             add_attribute(c, "listID", "TST")
 
         # Varugrupp ATC (STL)
-        if not is_cell_empty(str(row[col_index(config, "ITEMCLASSIFICATIONCODE_STL")].value)):
+        if not is_cell_empty(str(row[cols["ITEMCLASSIFICATIONCODE_STL"]])):
             cac = el_tree.SubElement(item, "cac:CommodityClassification")
-            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[col_index(config, "ITEMCLASSIFICATIONCODE_STL")].value))
+            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[cols["ITEMCLASSIFICATIONCODE_STL"]]))
             add_attribute(c, "listID", "STL")
 
         # Varugrupp ISO - 9999: 2016 (CC)
-        if not is_cell_empty(str(row[col_index(config, "ITEMCLASSIFICATIONCODE_CC")].value)):
+        if not is_cell_empty(str(row[cols["ITEMCLASSIFICATIONCODE_CC"]])):
             cac = el_tree.SubElement(item, "cac:CommodityClassification")
-            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[col_index(config, "ITEMCLASSIFICATIONCODE_CC")].value))
+            c = add_element(el_tree, cac, "cbc:ItemClassificationCode", str(row[cols["ITEMCLASSIFICATIONCODE_CC"]]))
             add_attribute(c, "listID", "CC")
             add_attribute(c, "listVersionID", "ISO-9999:2016")
 
         # Contracted item indicator
-        if not is_cell_empty(str(row[col_index(config, "CONTRACTED_ITEM")].value)):
-            if str(row[col_index(config, "CONTRACTED_ITEM")].value).lower() == "ja":
+        if not is_cell_empty(str(row[cols["CONTRACTED_ITEM"]])):
+            if str(row[cols["CONTRACTED_ITEM"]]).lower() == "ja":
                 cac = el_tree.SubElement(item, "cac:TransactionConditions")
                 add_element(el_tree, cac, "cbc:ActionCode", "CT")
 
-        if not is_cell_empty(str(row[col_index(config, "HAZARDOUSITEM_CODE")].value)):
+        if not is_cell_empty(str(row[cols["HAZARDOUSITEM_CODE"]])):
             cac = el_tree.SubElement(item, "cac:HazardousItem")
-            add_element(el_tree, cac, "cbc:UNDGCode", str(row[col_index(config, "HAZARDOUSITEM_CODE")].value))
-            add_element(el_tree, cac, "cbc:HazardClassID", str(row[col_index(config, "HAZARDOUSITEM_CLASS_ID")].value))
+            add_element(el_tree, cac, "cbc:UNDGCode", str(row[cols["HAZARDOUSITEM_CODE"]]))
+            add_element(el_tree, cac, "cbc:HazardClassID", str(row[cols["HAZARDOUSITEM_CLASS_ID"]]))
 
         # VAT category
-        if not is_cell_empty(str(row[col_index(config, "CLASSIFIEDTAXCATEGORY_CODE")].value)):
+        if not is_cell_empty(str(row[cols["CLASSIFIEDTAXCATEGORY_CODE"]])):
             cac = el_tree.SubElement(item, "cac:ClassifiedTaxCategory")
-            add_element(el_tree, cac, "cbc:ID", get_code(str(row[col_index(config, "CLASSIFIEDTAXCATEGORY_CODE")].value), vat_codes))
-            add_element(el_tree, cac, "cbc:Percent", str(row[col_index(config, "CLASSIFIEDTAXCATEGORY_CODE")].value))
+            add_element(el_tree, cac, "cbc:ID", get_code(str(row[cols["CLASSIFIEDTAXCATEGORY_CODE"]]), vat_codes))
+            add_element(el_tree, cac, "cbc:Percent", str(row[cols["CLASSIFIEDTAXCATEGORY_CODE"]]))
             cac = el_tree.SubElement(cac, "cac:TaxScheme")
             add_element(el_tree, cac, "cbc:ID", "VAT")
 
         # SFTI-specific use of additional item Property
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_VARIABLE_Q")].value)):
+        if not is_cell_empty(str(row[cols["ADD_PROP_VARIABLE_Q"]])):
             value_string = ""
-            if str(row[col_index(config, "ADD_PROP_VARIABLE_Q")].value) == "JA":
+            if str(row[cols["ADD_PROP_VARIABLE_Q"]]) == "JA":
                 value_string = "true"
             else:
                 value_string = "false"
             add_additional_item_prop(el_tree, item, "Variabelmåttvara", "VQ", "GS17009:SFTI", value_string, "SFTI:T0186")
 
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_AVAILABILITY")].value)):
-            add_additional_item_prop(el_tree, item, str(row[col_index(config, "ADD_PROP_AVAILABILITY")].value),
-                                     get_code(str(row[col_index(config, "ADD_PROP_AVAILABILITY")].value), item_availability_codes), "GS14183:SFTI", "true", "SFTI:T0014")
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_1_TYPE_FROM_TABLE")].value)):
-            add_additional_item_prop(el_tree, item, name=str(row[col_index(config, "ADD_PROP_1_TYPE_FROM_TABLE")].value),
-                                     name_code=get_code(str(row[col_index(config, "ADD_PROP_1_TYPE_FROM_TABLE")].value), item_attribute_codes),
-                                     name_code_list_id=get_code(str(row[col_index(config, "ADD_PROP_1_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr1"),
-                                     value=get_code(str(row[col_index(config, "ADD_PROP_1_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr2"),
-                                     value_qualifier=get_code(str(row[col_index(config, "ADD_PROP_1_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr3"))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_2_TYPE_FROM_TABLE")].value)):
-            add_additional_item_prop(el_tree, item, name=str(row[col_index(config, "ADD_PROP_2_TYPE_FROM_TABLE")].value),
-                                     name_code=get_code(str(row[col_index(config, "ADD_PROP_2_TYPE_FROM_TABLE")].value), item_attribute_codes),
-                                     name_code_list_id=get_code(str(row[col_index(config, "ADD_PROP_2_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr1"),
-                                     value=get_code(str(row[col_index(config, "ADD_PROP_2_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr2"),
-                                     value_qualifier=get_code(str(row[col_index(config, "ADD_PROP_2_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr3"))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_3_TYPE_FROM_TABLE")].value)):
-            add_additional_item_prop(el_tree, item, name=str(row[col_index(config, "ADD_PROP_3_TYPE_FROM_TABLE")].value),
-                                     name_code=get_code(str(row[col_index(config, "ADD_PROP_3_TYPE_FROM_TABLE")].value), item_attribute_codes),
-                                     name_code_list_id=get_code(str(row[col_index(config, "ADD_PROP_3_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr1"),
-                                     value=get_code(str(row[col_index(config, "ADD_PROP_3_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr2"),
-                                     value_qualifier=get_code(str(row[col_index(config, "ADD_PROP_3_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr3"))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_4_TYPE_FROM_TABLE")].value)):
-            add_additional_item_prop(el_tree, item, name=str(row[col_index(config, "ADD_PROP_4_TYPE_FROM_TABLE")].value),
-                                     name_code=get_code(str(row[col_index(config, "ADD_PROP_4_TYPE_FROM_TABLE")].value), item_attribute_codes),
-                                     name_code_list_id=get_code(str(row[col_index(config, "ADD_PROP_4_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr1"),
-                                     value=get_code(str(row[col_index(config, "ADD_PROP_4_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr2"),
-                                     value_qualifier=get_code(str(row[col_index(config, "ADD_PROP_4_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr3"))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_5_TYPE_FROM_TABLE")].value)):
-            add_additional_item_prop(el_tree, item, name=str(row[col_index(config, "ADD_PROP_5_TYPE_FROM_TABLE")].value),
-                                     name_code=get_code(str(row[col_index(config, "ADD_PROP_5_TYPE_FROM_TABLE")].value), item_attribute_codes),
-                                     name_code_list_id=get_code(str(row[col_index(config, "ADD_PROP_5_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr1"),
-                                     value=get_code(str(row[col_index(config, "ADD_PROP_5_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr2"),
-                                     value_qualifier=get_code(str(row[col_index(config, "ADD_PROP_5_TYPE_FROM_TABLE")].value), item_attribute_codes, alternate_field="Attr3"))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_1_NAME")].value)):
-            add_additional_item_prop(el_tree, item, str(row[col_index(config, "ADD_PROP_1_NAME")].value), "", "", str(row[col_index(config, "ADD_PROP_1_VALUE")].value),
-                                     get_code(str(row[col_index(config, "ADD_PROP_1_NAME")].value), item_property_codes))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_2_NAME")].value)):
-            add_additional_item_prop(el_tree, item, str(row[col_index(config, "ADD_PROP_2_NAME")].value), "", "", str(row[col_index(config, "ADD_PROP_2_VALUE")].value),
-                                     get_code(str(row[col_index(config, "ADD_PROP_2_NAME")].value), item_property_codes))
-
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_3_NAME")].value)):
-            add_additional_item_prop(el_tree, item, str(row[col_index(config, "ADD_PROP_3_NAME")].value), "", "", str(row[col_index(config, "ADD_PROP_3_VALUE")].value),
-                                     get_code(str(row[col_index(config, "ADD_PROP_3_NAME")].value), item_property_codes))
+        if not is_cell_empty(str(row[cols["ADD_PROP_AVAILABILITY"]])):
+            add_additional_item_prop(el_tree, item, str(row[cols["ADD_PROP_AVAILABILITY"]]),
+                                     get_code(str(row[cols["ADD_PROP_AVAILABILITY"]]), item_availability_codes), "GS14183:SFTI", "true", "SFTI:T0014")
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_1_TYPE_FROM_TABLE"]])):
+            add_additional_item_prop(el_tree, item, name=str(row[cols["ADD_PROP_1_TYPE_FROM_TABLE"]]),
+                                     name_code=get_code(str(row[cols["ADD_PROP_1_TYPE_FROM_TABLE"]]), item_attribute_codes),
+                                     name_code_list_id=get_code(str(row[cols["ADD_PROP_1_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr1"),
+                                     value=get_code(str(row[cols["ADD_PROP_1_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr2"),
+                                     value_qualifier=get_code(str(row[cols["ADD_PROP_1_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr3"))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_2_TYPE_FROM_TABLE"]])):
+            add_additional_item_prop(el_tree, item, name=str(row[cols["ADD_PROP_2_TYPE_FROM_TABLE"]]),
+                                     name_code=get_code(str(row[cols["ADD_PROP_2_TYPE_FROM_TABLE"]]), item_attribute_codes),
+                                     name_code_list_id=get_code(str(row[cols["ADD_PROP_2_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr1"),
+                                     value=get_code(str(row[cols["ADD_PROP_2_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr2"),
+                                     value_qualifier=get_code(str(row[cols["ADD_PROP_2_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr3"))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_3_TYPE_FROM_TABLE"]])):
+            add_additional_item_prop(el_tree, item, name=str(row[cols["ADD_PROP_3_TYPE_FROM_TABLE"]]),
+                                     name_code=get_code(str(row[cols["ADD_PROP_3_TYPE_FROM_TABLE"]]), item_attribute_codes),
+                                     name_code_list_id=get_code(str(row[cols["ADD_PROP_3_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr1"),
+                                     value=get_code(str(row[cols["ADD_PROP_3_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr2"),
+                                     value_qualifier=get_code(str(row[cols["ADD_PROP_3_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr3"))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_4_TYPE_FROM_TABLE"]])):
+            add_additional_item_prop(el_tree, item, name=str(row[cols["ADD_PROP_4_TYPE_FROM_TABLE"]]),
+                                     name_code=get_code(str(row[cols["ADD_PROP_4_TYPE_FROM_TABLE"]]), item_attribute_codes),
+                                     name_code_list_id=get_code(str(row[cols["ADD_PROP_4_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr1"),
+                                     value=get_code(str(row[cols["ADD_PROP_4_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr2"),
+                                     value_qualifier=get_code(str(row[cols["ADD_PROP_4_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr3"))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_5_TYPE_FROM_TABLE"]])):
+            add_additional_item_prop(el_tree, item, name=str(row[cols["ADD_PROP_5_TYPE_FROM_TABLE"]]),
+                                     name_code=get_code(str(row[cols["ADD_PROP_5_TYPE_FROM_TABLE"]]), item_attribute_codes),
+                                     name_code_list_id=get_code(str(row[cols["ADD_PROP_5_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr1"),
+                                     value=get_code(str(row[cols["ADD_PROP_5_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr2"),
+                                     value_qualifier=get_code(str(row[cols["ADD_PROP_5_TYPE_FROM_TABLE"]]), item_attribute_codes, alternate_field="Attr3"))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_1_NAME"]])):
+            add_additional_item_prop(el_tree, item, str(row[cols["ADD_PROP_1_NAME"]]), "", "", str(row[cols["ADD_PROP_1_VALUE"]]),
+                                     get_code(str(row[cols["ADD_PROP_1_NAME"]]), item_property_codes))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_2_NAME"]])):
+            add_additional_item_prop(el_tree, item, str(row[cols["ADD_PROP_2_NAME"]]), "", "", str(row[cols["ADD_PROP_2_VALUE"]]),
+                                     get_code(str(row[cols["ADD_PROP_2_NAME"]]), item_property_codes))
+
+        if not is_cell_empty(str(row[cols["ADD_PROP_3_NAME"]])):
+            add_additional_item_prop(el_tree, item, str(row[cols["ADD_PROP_3_NAME"]]), "", "", str(row[cols["ADD_PROP_3_VALUE"]]),
+                                     get_code(str(row[cols["ADD_PROP_3_NAME"]]), item_property_codes))
 
         # Users own text property
-        if not is_cell_empty(str(row[col_index(config, "ADD_PROP_1_USERTEXT_NAME")].value)):
-            add_additional_item_prop(el_tree, item, str(row[col_index(config, "ADD_PROP_1_USERTEXT_NAME")].value), "", "", str(row[col_index(config, "ADD_PROP_1_USERTEXT_VALUE")].value), "")
+        if not is_cell_empty(str(row[cols["ADD_PROP_1_USERTEXT_NAME"]])):
+            add_additional_item_prop(el_tree, item, str(row[cols["ADD_PROP_1_USERTEXT_NAME"]]), "", "", str(row[cols["ADD_PROP_1_USERTEXT_VALUE"]]), "")
 
-        if not is_cell_empty(str(row[col_index(config, "MANUFACTURERPARTY_NAME")].value)):
+        if not is_cell_empty(str(row[cols["MANUFACTURERPARTY_NAME"]])):
             cac = el_tree.SubElement(item, "cac:ManufacturerParty")
             cac1 = el_tree.SubElement(cac, "cac:PartyName")
-            add_element(el_tree, cac1, "cbc:Name", str(row[col_index(config, "MANUFACTURERPARTY_NAME")].value))
+            add_element(el_tree, cac1, "cbc:Name", str(row[cols["MANUFACTURERPARTY_NAME"]]))
 
         # CERTIFICATES Environment
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_ENV_1")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_ENV_1")].value), item_certificate_env_codes), "Environmental",
-                                 str(row[col_index(config, "CERTIFICATE_ENV_1")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_ENV_1"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_ENV_1"]]), item_certificate_env_codes), "Environmental",
+                                 str(row[cols["CERTIFICATE_ENV_1"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_ENV_2")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_ENV_2")].value), item_certificate_env_codes), "Environmental",
-                                 str(row[col_index(config, "CERTIFICATE_ENV_2")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_ENV_2"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_ENV_2"]]), item_certificate_env_codes), "Environmental",
+                                 str(row[cols["CERTIFICATE_ENV_2"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_ENV_3")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_ENV_3")].value), item_certificate_env_codes), "Environmental",
-                                 str(row[col_index(config, "CERTIFICATE_ENV_3")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_ENV_3"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_ENV_3"]]), item_certificate_env_codes), "Environmental",
+                                 str(row[cols["CERTIFICATE_ENV_3"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_ENV_4")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_ENV_4")].value), item_certificate_env_codes), "Environmental",
-                                 str(row[col_index(config, "CERTIFICATE_ENV_4")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_ENV_4"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_ENV_4"]]), item_certificate_env_codes), "Environmental",
+                                 str(row[cols["CERTIFICATE_ENV_4"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_ENV_5")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_ENV_5")].value), item_certificate_env_codes), "Environmental",
-                                 str(row[col_index(config, "CERTIFICATE_ENV_5")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_ENV_5"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_ENV_5"]]), item_certificate_env_codes), "Environmental",
+                                 str(row[cols["CERTIFICATE_ENV_5"]]), "GS1SWEDENT0142")
 
         # Nutrition
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_NUTR_1")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_NUTR_1")].value), item_certificate_nutr_codes), "Nutrition",
-                                 str(row[col_index(config, "CERTIFICATE_NUTR_1")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_NUTR_1"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_NUTR_1"]]), item_certificate_nutr_codes), "Nutrition",
+                                 str(row[cols["CERTIFICATE_NUTR_1"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_NUTR_2")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_NUTR_2")].value), item_certificate_nutr_codes), "Nutrition",
-                                 str(row[col_index(config, "CERTIFICATE_NUTR_2")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_NUTR_2"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_NUTR_2"]]), item_certificate_nutr_codes), "Nutrition",
+                                 str(row[cols["CERTIFICATE_NUTR_2"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_NUTR_3")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_NUTR_3")].value), item_certificate_nutr_codes), "Nutrition",
-                                 str(row[col_index(config, "CERTIFICATE_NUTR_3")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_NUTR_3"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_NUTR_3"]]), item_certificate_nutr_codes), "Nutrition",
+                                 str(row[cols["CERTIFICATE_NUTR_3"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_NUTR_4")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_NUTR_4")].value), item_certificate_nutr_codes), "Nutrition",
-                                 str(row[col_index(config, "CERTIFICATE_NUTR_4")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_NUTR_4"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_NUTR_4"]]), item_certificate_nutr_codes), "Nutrition",
+                                 str(row[cols["CERTIFICATE_NUTR_4"]]), "GS1SWEDENT0142")
 
-        if not is_cell_empty(str(row[col_index(config, "CERTIFICATE_NUTR_5")].value)):
-            add_item_certificate(el_tree, item, get_code(str(row[col_index(config, "CERTIFICATE_NUTR_5")].value), item_certificate_nutr_codes), "Nutrition",
-                                 str(row[col_index(config, "CERTIFICATE_NUTR_5")].value), "GS1SWEDENT0142")
+        if not is_cell_empty(str(row[cols["CERTIFICATE_NUTR_5"]])):
+            add_item_certificate(el_tree, item, get_code(str(row[cols["CERTIFICATE_NUTR_5"]]), item_certificate_nutr_codes), "Nutrition",
+                                 str(row[cols["CERTIFICATE_NUTR_5"]]), "GS1SWEDENT0142")
 
         # Length/Depth
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_LN_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_LN_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "LN")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_LN_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_LN_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_LN_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_LN_MEASURE_UOM"]]), unit_codes))
 
         # Width
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_WD_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_WD_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "WD")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_WD_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_WD_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_WD_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_WD_MEASURE_UOM"]]), unit_codes))
 
         # Height
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_HT_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_HT_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "HT")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_HT_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_HT_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_HT_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_HT_MEASURE_UOM"]]), unit_codes))
 
         # Weight
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_GW_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_GW_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "GW")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_GW_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_GW_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_GW_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_GW_MEASURE_UOM"]]), unit_codes))
 
         # Volume
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_ABJ_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_ABJ_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "ABJ")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_ABJ_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_ABJ_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_ABJ_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_ABJ_MEASURE_UOM"]]), unit_codes))
 
         # net weight
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_AAF_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_AAF_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "AAF")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_AAF_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_AAF_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_AAF_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_AAF_MEASURE_UOM"]]), unit_codes))
 
         # Approx net weight
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_APPROX_AAF_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_APPROX_AAF_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "AAF")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_APPROX_AAF_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_APPROX_AAF_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_APPROX_AAF_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_APPROX_AAF_MEASURE_UOM"]]), unit_codes))
             add_element(el_tree, cac, "cbc:Description", "Approximate net weight")
 
         # net volume
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_AAX_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_AAX_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "AAX")
-            c = add_element(el_tree, cac, "cbc:Measure", str(row[col_index(config, "DIMENSION_ATTR_AAX_MEASURE")].value))
-            add_attribute(c, "unitCode", get_code(str(row[col_index(config, "DIMENSION_ATTR_AAX_MEASURE_UOM")].value), unit_codes))
+            c = add_element(el_tree, cac, "cbc:Measure", str(row[cols["DIMENSION_ATTR_AAX_MEASURE"]]))
+            add_attribute(c, "unitCode", get_code(str(row[cols["DIMENSION_ATTR_AAX_MEASURE_UOM"]]), unit_codes))
 
         # Temperature min max
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_TC_MIN_MEASURE")].value)) or not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_TC_MAX_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_TC_MIN_MEASURE"]])) or not is_cell_empty(str(row[cols["DIMENSION_ATTR_TC_MAX_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "TC")
-            c = add_element(el_tree, cac, "cbc:MinimumMeasure", str(row[col_index(config, "DIMENSION_ATTR_TC_MIN_MEASURE")].value))
+            c = add_element(el_tree, cac, "cbc:MinimumMeasure", str(row[cols["DIMENSION_ATTR_TC_MIN_MEASURE"]]))
             add_attribute(c, "unitCode", "CEL")
-            c = add_element(el_tree, cac, "cbc:MaximumMeasure", str(row[col_index(config, "DIMENSION_ATTR_TC_MAX_MEASURE")].value))
+            c = add_element(el_tree, cac, "cbc:MaximumMeasure", str(row[cols["DIMENSION_ATTR_TC_MAX_MEASURE"]]))
             add_attribute(c, "unitCode", "CEL")
 
         # Humidity min max
-        if not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_AAO_MIN_MEASURE")].value)) or not is_cell_empty(str(row[col_index(config, "DIMENSION_ATTR_AAO_MAX_MEASURE")].value)):
+        if not is_cell_empty(str(row[cols["DIMENSION_ATTR_AAO_MIN_MEASURE"]])) or not is_cell_empty(str(row[cols["DIMENSION_ATTR_AAO_MAX_MEASURE"]])):
             cac = el_tree.SubElement(item, "cac:Dimension")
             add_element(el_tree, cac, "cbc:AttributeID", "AAO")
-            c = add_element(el_tree, cac, "cbc:MinimumMeasure", str(row[col_index(config, "DIMENSION_ATTR_AAO_MIN_MEASURE")].value))
+            c = add_element(el_tree, cac, "cbc:MinimumMeasure", str(row[cols["DIMENSION_ATTR_AAO_MIN_MEASURE"]]))
             add_attribute(c, "unitCode", "P1")
-            c = add_element(el_tree, cac, "cbc:MaximumMeasure", str(row[col_index(config, "DIMENSION_ATTR_AAO_MAX_MEASURE")].value))
+            c = add_element(el_tree, cac, "cbc:MaximumMeasure", str(row[cols["DIMENSION_ATTR_AAO_MAX_MEASURE"]]))
             add_attribute(c, "unitCode", "P1")
 
-    if str(sheet_header[header_cell(config, "USE_SBDH")].value) == "JA":
-        root = add_to_sbdh(root, str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_ENDPOINT_ID_SCHEMEID")].value),
-                           str(sheet_header[header_cell(config, "PROVIDER_SUPPLIER_ENDPOINT_ID")].value),
-                           str(sheet_header[header_cell(config, "RECEIVER_BUYER_ENDPOINT_ID_SCHEMEID")].value),
-                           str(sheet_header[header_cell(config, "RECEIVER_BUYER_ENDPOINT_ID")].value),
-                           get_code(str(sheet_header[header_cell(config, "PROVIDER_SBDH_COUNTRYCODE")].value), country_codes))
+    if integrity_check is not None:
+        report = integrity_check.resolve()
+        if fail_on_integrity_errors and not report.ok:
+            raise ValueError(report.summary())
+
+    if str(header["USE_SBDH"]) == "JA":
+        if deterministic:
+            if instance_identifier is None:
+                instance_identifier = derive_instance_identifier(digest)
+            if creation_date_time is None:
+                creation_date_time = derive_creation_date_time(header["CATALOGUE_ISSUEDATE"])
+
+        root = add_to_sbdh(root, str(header["PROVIDER_SUPPLIER_ENDPOINT_ID_SCHEMEID"]),
+                           str(header["PROVIDER_SUPPLIER_ENDPOINT_ID"]),
+                           str(header["RECEIVER_BUYER_ENDPOINT_ID_SCHEMEID"]),
+                           str(header["RECEIVER_BUYER_ENDPOINT_ID"]),
+                           get_code(str(header["PROVIDER_SBDH_COUNTRYCODE"]), country_codes),
+                           instance_identifier, creation_date_time)
 
     return el_tree.tostring(root, encoding="utf-8", xml_declaration=True).decode("utf-8")
 
 
+if __name__ == "__main__":
+    # python -m excel_catalogue_to_xml serve|convert, see worker.py
+    import sys
+    from worker import main
+
+    sys.exit(main())
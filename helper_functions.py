@@ -13,11 +13,15 @@
  * See the License for the specific language governing permissions and
   limitations under the License.
  """
-import openpyxl
+import functools
+import os
 import re
 import xml.etree.ElementTree as el_sbdh_tree
-import uuid
-from datetime import datetime
+
+# Default location of the template cell/column mapping, next to this module rather than in the cwd
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ExcelCellLocations.cfg")
+
+_WHITESPACE = re.compile(r'\s+')
 
 
 def load_code_list(wb, col_range):
@@ -63,6 +67,50 @@ def load_code_list(wb, col_range):
     return code_list
 
 
+@functools.lru_cache(maxsize=None)
+def load_config(config_file=CONFIG_FILE):
+    # Parsed once per process and reused by later (warm) conversions
+    import configparser
+    config = configparser.ConfigParser()
+    # read() silently skips missing files; raise instead, so that an empty config is never cached
+    if not config.read(config_file):
+        raise FileNotFoundError(f"Configuration file {config_file} not found.")
+    return config
+
+
+class ColumnIndices(dict):
+    """Precompiled name -> column index table for the [LineColIndex] section."""
+
+    def __missing__(self, name):
+        raise Exception(f"Column index range for {name} not found in the configuration.")
+
+
+@functools.lru_cache(maxsize=None)
+def load_col_indices(config_file=CONFIG_FILE):
+    config = load_config(config_file)
+    cols = ColumnIndices()
+    for name, value in config.items("LineColIndex"):
+        # Business terms without a column in the template are left unmapped
+        if value != "":
+            cols[name.upper()] = int(value)
+    return cols
+
+
+class HeaderValues(dict):
+    """Header values by [HeaderCell] name."""
+
+    def __missing__(self, name):
+        raise Exception(f"Header cell for {name} not found in the configuration.")
+
+
+def read_header(ws, config):
+    return HeaderValues({name.upper(): ws[cell].value for name, cell in config.items("HeaderCell")})
+
+
+def load_code_lists(wb, config):
+    return {name.upper(): load_code_list(wb, cl_range(config, name)) for name in config.options("CodeLists")}
+
+
 def header_cell(config, name):
     try:
         return str(config.get("HeaderCell", name))
@@ -173,21 +221,24 @@ def is_cell_empty(value: str) -> bool:
 
 
 def normalize_space(s: str) -> str:
-    return re.sub(r'\s+', ' ', s).strip()
+    return _WHITESPACE.sub(' ', s).strip()
 
 
 def separated_string(input_str):
-    # split string into array
-    values = input_str.split(";")
+    # split string into array, without surrounding whitespace and empty entries (e.g. from a trailing or doubled ;)
+    values = [value.strip() for value in input_str.split(";")]
+    return [value for value in values if value != ""]
 
-    # handle trailing ;
-    if values[-1] == "":
-        values.pop()
 
-    return values
+def reset_read_only_dimensions(wb, sheet_names=("CatalogueLines", "CodeLists")):
+    # Read-only worksheets trust the <dimension> stored in the file, which may be wrong (e.g. "A1") and
+    # would then silently cut rows and columns off; resetting makes them read up to the real last cell
+    for name in sheet_names:
+        if name in wb.sheetnames and hasattr(wb[name], "reset_dimensions"):
+            wb[name].reset_dimensions()
 
 
-def check_spreadsheet_consistency(wb: openpyxl.Workbook):
+def check_spreadsheet_consistency(wb: "openpyxl.Workbook"):
     try:
         #Try to assign the sheets to ensure they exist
         sheet_header = wb["CatalogueHeader"]
@@ -196,9 +247,9 @@ def check_spreadsheet_consistency(wb: openpyxl.Workbook):
     except Exception as e:
         raise ValueError("Excel sheet names not according to SFTI template.") from e
 
-    # Check that the columns have not been rearranged
-    for col_idx, col in enumerate(sheet_lines.iter_cols(min_row=1, max_row=1), 1):
-        for cell in col:
+    # Check that the columns have not been rearranged (first row read with iter_rows, which read-only worksheets also support)
+    for row in sheet_lines.iter_rows(min_row=1, max_row=1):
+        for col_idx, cell in enumerate(row, 1):
             if not cell.value:
                 return
 
@@ -207,7 +258,37 @@ def check_spreadsheet_consistency(wb: openpyxl.Workbook):
                 raise ValueError(f"Column index not correct for column {str(col_idx)}. Ensure that the SFTI template has not been altered with.")
 
 
-def add_to_sbdh(catalogue, sender_id_scheme: str, sender_id: str, receiver_id_scheme: str, receiver_id: str, sender_countrycode: str):
+def derive_instance_identifier(digest: str) -> str:
+    # Name-based UUID, so that the same content always gives the same identifier
+    import uuid
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"urn:sha256:{digest}"))
+
+
+def derive_creation_date_time(issue_date):
+    # Midnight UTC of the catalogue issue date, falling back to the epoch if the date cannot be read
+    from datetime import datetime
+    if isinstance(issue_date, datetime):
+        return datetime(issue_date.year, issue_date.month, issue_date.day)
+    try:
+        return datetime.strptime(str(issue_date).split(" ")[0], "%Y-%m-%d")
+    except ValueError:
+        return datetime(1970, 1, 1)
+
+
+def add_to_sbdh(catalogue, sender_id_scheme: str, sender_id: str, receiver_id_scheme: str, receiver_id: str, sender_countrycode: str,
+                instance_identifier: str = None, creation_date_time=None):
+    # Only needed when enveloping, so kept out of the import path
+    import uuid
+    from datetime import datetime, timezone
+
+    # Unless given by the caller, every envelope gets a new identifier and the current time
+    if instance_identifier is None:
+        instance_identifier = str(uuid.uuid4())
+    if creation_date_time is None:
+        creation_date_time = datetime.utcnow()
+    elif creation_date_time.tzinfo is not None:
+        # Written with a Z suffix, so offset-aware times are converted to UTC first
+        creation_date_time = creation_date_time.astimezone(timezone.utc).replace(tzinfo=None)
 
     sbdh = el_sbdh_tree.Element("StandardBusinessDocument")
     sbdh.set("xmlns", "http://www.unece.org/cefact/namespaces/StandardBusinessDocumentHeader")
@@ -223,9 +304,9 @@ def add_to_sbdh(catalogue, sender_id_scheme: str, sender_id: str, receiver_id_sc
     d = el_sbdh_tree.SubElement(h, "DocumentIdentification")
     e = add_element(el_sbdh_tree, d, "Standard", "urn:oasis:names:specification:ubl:schema:xsd:Catalogue-2")
     e = add_element(el_sbdh_tree, d, "TypeVersion", "2.1")
-    e = add_element(el_sbdh_tree, d, "InstanceIdentifier", str(uuid.uuid4()))
+    e = add_element(el_sbdh_tree, d, "InstanceIdentifier", instance_identifier)
     e = add_element(el_sbdh_tree, d, "Type", "Catalogue")
-    e = add_element(el_sbdh_tree, d, "CreationDateAndTime", datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"))
+    e = add_element(el_sbdh_tree, d, "CreationDateAndTime", creation_date_time.strftime("%Y-%m-%dT%H:%M:%SZ"))
     b = el_sbdh_tree.SubElement(h, "BusinessScope")
     bs = el_sbdh_tree.SubElement(b, "Scope")
     e = add_element(el_sbdh_tree, bs, "Type", "DOCUMENTID")
@@ -0,0 +1,99 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+"""
+
+
+class IntegrityReport:
+    """Dangling related item references and duplicate identifiers found in a catalogue."""
+
+    def __init__(self, dangling_references, duplicates):
+        # [{"row", "line_id", "element", "id"}]
+        self.dangling_references = dangling_references
+        # [{"field", "id", "row", "first_row"}]
+        self.duplicates = duplicates
+
+    @property
+    def ok(self) -> bool:
+        return not self.dangling_references and not self.duplicates
+
+    def summary(self) -> str:
+        if self.ok:
+            return "Catalogue integrity check passed."
+        parts = []
+        if self.dangling_references:
+            first = self.dangling_references[0]
+            parts.append(f"{len(self.dangling_references)} dangling related item reference(s), "
+                         f"first {first['element']} {first['id']} on row {first['row']}")
+        if self.duplicates:
+            first = self.duplicates[0]
+            parts.append(f"{len(self.duplicates)} duplicate identifier(s), "
+                         f"first {first['field']} {first['id']} on rows {first['first_row']} and {first['row']}")
+        return "Catalogue integrity check failed: " + "; ".join(parts) + "."
+
+    def as_dict(self, limit=None) -> dict:
+        return {
+            "ok": self.ok,
+            "dangling_reference_count": len(self.dangling_references),
+            "duplicate_count": len(self.duplicates),
+            "dangling_references": self.dangling_references[:limit],
+            "duplicates": self.duplicates[:limit],
+        }
+
+
+class IntegrityCheck:
+    """
+    Hash indexes of line IDs and item identifiers, filled while the catalogue lines are streamed.
+    Related item references are collected as they come and resolved in one pass at the end, so
+    the whole check is linear in the number of lines and references.
+    A reference resolves if it matches a line ID, a seller's item ID or a standard item ID (GTIN).
+    Values are compared exactly as they are written to the XML, the caller passes them already normalised.
+    """
+
+    # Identifier fields where a value may only be used once in a catalogue
+    UNIQUE_FIELDS = ("LINE_ID", "SELLERSITEMIDENTIFICATION_ID", "STANDARDITEMIDENTIFICATION_ID")
+
+    # (column, element written for it, whether the column holds a ;-separated list)
+    REFERENCE_FIELDS = (("COMPREL_ITEM_ID", "ComponentRelatedItem", False),
+                        ("COMPREL2_ITEM_ID", "ComponentRelatedItem", True),
+                        ("ASSOCREL_ITEM_ID", "AccessoryRelatedItem", True),
+                        ("REQUIREDREL_ITEM_ID", "RequiredRelatedItem", True),
+                        ("REPLACEDREL_ITEM_ID", "ReplacedRelatedItem", False))
+
+    def __init__(self):
+        self.index = {field: {} for field in self.UNIQUE_FIELDS}
+        self.references = []
+        self.duplicates = []
+        self.report = None
+
+    def add_identifier(self, field, value, row):
+        value = str(value)
+        index = self.index[field]
+        first_row = index.setdefault(value, row)
+        if first_row != row:
+            self.duplicates.append({"field": field, "id": value, "row": row, "first_row": first_row})
+
+    def add_reference(self, element, value, row, line_id):
+        self.references.append((row, str(line_id), element, str(value)))
+
+    def resolve(self) -> IntegrityReport:
+        known = set()
+        for index in self.index.values():
+            known.update(index)
+
+        dangling = [{"row": row, "line_id": line_id, "element": element, "id": value}
+                    for row, line_id, element, value in self.references if value not in known]
+        self.report = IntegrityReport(dangling, self.duplicates)
+        return self.report
@@ -0,0 +1,244 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+Resource-aware execution planning. The xlsx zip directory and the first bytes of a few
+parts are inspected up front (no cells are parsed), peak memory and time are estimated
+for each strategy, and the fastest strategy that fits the memory budget is chosen:
+
+    in-memory  full openpyxl workbook, every cell of the catalogue held in memory
+               (fastest for small workbooks)
+    streaming  read-only openpyxl workbook, catalogue lines parsed one row at a time
+               (less memory and faster for large workbooks, but a fixed cost for header lookups)
+
+Both strategies build the same output tree, so its size is part of every estimate. Most of the
+memory goes into per-cell objects, so the number of filled CatalogueLines cells is estimated
+from the cell density of the first part of the sheet XML.
+"""
+import io
+import posixpath
+import re
+import xml.etree.ElementTree as el_tree
+import zipfile
+
+STRATEGY_IN_MEMORY = "in-memory"
+STRATEGY_STREAMING = "streaming"
+
+# In order of preference when the estimates are equal
+STRATEGIES = (STRATEGY_IN_MEMORY, STRATEGY_STREAMING)
+
+# Cost model, fitted against peak RSS with benchmarks/planner_memory.py
+BASE_BYTES = 32 * 1024 * 1024               # interpreter, openpyxl and the converter
+OUTPUT_BYTES_PER_CELL = 380                 # row tuple, ElementTree elements, serialised bytes and their str copy per filled line cell
+OUTPUT_BYTES_PER_XML_BYTE = 1.8             # inline cell text, per byte of uncompressed CatalogueLines XML
+WORKBOOK_BYTES_PER_CELL = 400               # openpyxl cell object per filled line cell (in-memory)
+EMPTY_CELL_BYTES = 220                      # in-memory rows are padded with empty cells up to the last column
+WORKBOOK_BYTES_PER_XML_BYTE = 8             # other sheets, per byte of uncompressed sheet XML (in-memory)
+SHARED_STRING_BYTES_PER_XML_BYTE = 3        # the shared string table is loaded in both strategies
+SAFETY_MARGIN = 1.2
+
+# Rough relative speed, only used to choose between strategies that both fit the budget
+SECONDS_PER_XML_MB = {STRATEGY_IN_MEMORY: 1.35, STRATEGY_STREAMING: 0.9}
+SECONDS_OVERHEAD = {STRATEGY_IN_MEMORY: 0.0, STRATEGY_STREAMING: 0.04}
+
+# Columns of the SFTI CatalogueLines sheet, used when the dimension is missing
+TEMPLATE_COLUMNS = 100
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z]+)?(\d+)?(?::([A-Z]+)(\d+))?"')
+_SHARED_STRING_COUNT = re.compile(rb'uniqueCount="(\d+)"')
+_CELL = re.compile(rb'<(?:\w+:)?c[\s/>]')
+_ROW = re.compile(rb'<(?:\w+:)?row[\s/>]')
+
+# Bytes read from the start of a part when looking for its dimension / count attributes
+_PEEK_BYTES = 64 * 1024
+
+
+class MemoryBudgetExceeded(ValueError):
+    """No strategy fits the memory budget. The rejected plan is available as .plan"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        strategy = min(plan.estimates, key=lambda name: plan.estimates[name]["memory"])
+        lines = plan.workbook.line_rows if plan.max_line_items is None else min(plan.workbook.line_rows, plan.max_line_items)
+        super().__init__(f"Estimated peak memory of {_mb(plan.estimates[strategy]['memory'])} MB "
+                         f"({strategy}) exceeds the memory budget of {_mb(plan.memory_budget)} MB "
+                         f"for {lines} catalogue lines.")
+
+    def __reduce__(self):
+        # Rebuilt from the plan, so the exception survives a process pool
+        return MemoryBudgetExceeded, (self.plan,)
+
+
+class WorkbookStats:
+    """What the zip directory tells about a workbook, without parsing any cells."""
+
+    def __init__(self, file_size, sheet_sizes, shared_strings, shared_strings_size, line_rows, line_columns, line_cells):
+        self.file_size = file_size
+        # Uncompressed XML size per sheet name
+        self.sheet_sizes = sheet_sizes
+        self.shared_strings = shared_strings
+        self.shared_strings_size = shared_strings_size
+        # From the CatalogueLines dimension, excluding the two template header rows
+        self.line_rows = line_rows
+        self.line_columns = line_columns
+        # Filled CatalogueLines cells, extrapolated from the start of the sheet XML
+        self.line_cells = line_cells
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class ExecutionPlan:
+
+    def __init__(self, workbook, memory_budget, estimates, strategy, max_line_items=None):
+        self.workbook = workbook
+        self.memory_budget = memory_budget
+        self.max_line_items = max_line_items
+        # {strategy: {"memory": bytes, "seconds": float}}
+        self.estimates = estimates
+        # None if no strategy fits the budget
+        self.strategy = strategy
+
+    @property
+    def memory(self):
+        return self.estimates[self.strategy]["memory"] if self.strategy else None
+
+    @property
+    def seconds(self):
+        return self.estimates[self.strategy]["seconds"] if self.strategy else None
+
+    def as_dict(self) -> dict:
+        return {"strategy": self.strategy, "memory_budget": self.memory_budget, "max_line_items": self.max_line_items,
+                "estimates": self.estimates, "workbook": self.workbook.as_dict()}
+
+
+def _mb(value) -> str:
+    return f"{value / (1024 * 1024):.0f}" if value is not None else "unlimited"
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for char in letters:
+        number = number * 26 + ord(char) - ord("A") + 1
+    return number
+
+
+def _peek(zf: zipfile.ZipFile, name: str) -> bytes:
+    with zf.open(name) as f:
+        return f.read(_PEEK_BYTES)
+
+
+def _sheet_paths(zf: zipfile.ZipFile) -> dict:
+    # Sheet name -> part name, via workbook.xml and its relationships
+    workbook = el_tree.fromstring(zf.read("xl/workbook.xml"))
+    rels = el_tree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_NS_PACKAGE_REL}Relationship")}
+
+    paths = {}
+    for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+        target = targets.get(sheet.get(f"{_NS_REL}id"))
+        if target:
+            paths[sheet.get("name")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    return paths
+
+
+def inspect_workbook(excel_file) -> WorkbookStats:
+    '''
+    Reads sheet sizes, shared string count, the CatalogueLines dimension and its cell density from the xlsx zip
+    :param excel_file: file path to the file or byte-array containing the file
+    :return: WorkbookStats
+    '''
+    try:
+        source = excel_file if isinstance(excel_file, str) else io.BytesIO(excel_file)
+        with zipfile.ZipFile(source) as zf:
+            sizes = {info.filename: info.file_size for info in zf.infolist()}
+            file_size = sum(info.compress_size for info in zf.infolist())
+            paths = _sheet_paths(zf)
+
+            shared_strings = 0
+            shared_strings_size = sizes.get("xl/sharedStrings.xml", 0)
+            if shared_strings_size:
+                match = _SHARED_STRING_COUNT.search(_peek(zf, "xl/sharedStrings.xml"))
+                # Without a count attribute, assume an average of 100 bytes per string
+                shared_strings = int(match.group(1)) if match else shared_strings_size // 100
+
+            lines_path = paths.get("CatalogueLines")
+            if lines_path is None or lines_path not in sizes:
+                raise ValueError("Excel sheet names not according to SFTI template.")
+            sample = _peek(zf, lines_path)
+    except (zipfile.BadZipFile, KeyError, el_tree.ParseError, OSError) as e:
+        raise ValueError("Not a valid Excel file") from e
+
+    # Cells and rows per byte in the first part of the sheet, exact if the sheet fits in the sample.
+    # The two template header rows are counted as they are, they would skew the density of the lines
+    lines_size = sizes[lines_path]
+    row_starts = [match.start() for match in _ROW.finditer(sample)]
+    body = row_starts[2] if len(row_starts) > 2 else len(sample)
+    scale = (lines_size - body) / (len(sample) - body) if len(sample) > body else 0
+    cells = len(_CELL.findall(sample, 0, body)) + int(len(_CELL.findall(sample, body)) * scale)
+    rows = min(len(row_starts), 2) + int(max(len(row_starts) - 2, 0) * scale)
+
+    dimension = _DIMENSION.search(sample)
+    if dimension and dimension.group(4):
+        rows = int(dimension.group(4))
+        columns = _column_number(dimension.group(3).decode())
+    else:
+        # No (or a single cell) dimension, e.g. written by a tool that does not keep it up to date
+        columns = None
+
+    return WorkbookStats(file_size, {name: sizes[path] for name, path in paths.items() if path in sizes},
+                         shared_strings, shared_strings_size, max(rows - 2, 0), columns, cells)
+
+
+def estimate(stats: WorkbookStats, strategy: str, max_line_items=None) -> dict:
+    xml_bytes = sum(stats.sheet_sizes.values())
+    # Only the converted lines end up in the output tree
+    converted = 1.0
+    if max_line_items is not None and stats.line_rows > max_line_items:
+        converted = max_line_items / stats.line_rows
+    converted_cells = stats.line_cells * converted
+    lines_xml_bytes = stats.sheet_sizes.get("CatalogueLines", 0)
+
+    memory = (BASE_BYTES + stats.shared_strings_size * SHARED_STRING_BYTES_PER_XML_BYTE
+              + (stats.line_cells * OUTPUT_BYTES_PER_CELL + lines_xml_bytes * OUTPUT_BYTES_PER_XML_BYTE) * converted)
+    if strategy == STRATEGY_IN_MEMORY:
+        # The whole workbook is loaded, but only the converted rows are padded up to the last column
+        other_sheets = xml_bytes - lines_xml_bytes
+        padded_cells = stats.line_rows * converted * (stats.line_columns or TEMPLATE_COLUMNS)
+        memory += (stats.line_cells * WORKBOOK_BYTES_PER_CELL + max(padded_cells - converted_cells, 0) * EMPTY_CELL_BYTES
+                   + other_sheets * WORKBOOK_BYTES_PER_XML_BYTE)
+    elif strategy != STRATEGY_STREAMING:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    seconds = SECONDS_OVERHEAD[strategy] + xml_bytes / (1024 * 1024) * SECONDS_PER_XML_MB[strategy]
+    return {"memory": int(memory * SAFETY_MARGIN), "seconds": round(seconds, 3)}
+
+
+def plan_conversion(excel_file, memory_budget=None, max_line_items=None) -> ExecutionPlan:
+    '''
+    Picks the fastest strategy whose estimated peak memory fits the budget
+    :param excel_file: file path to the file or byte-array containing the file
+    :param memory_budget: memory budget in bytes, None for no limit
+    :param max_line_items: maximum number of line items that will be converted
+    :return: ExecutionPlan, with strategy None if nothing fits
+    '''
+    stats = inspect_workbook(excel_file)
+    estimates = {strategy: estimate(stats, strategy, max_line_items) for strategy in STRATEGIES}
+    fitting = [strategy for strategy in STRATEGIES if memory_budget is None or estimates[strategy]["memory"] <= memory_budget]
+    strategy = min(fitting, key=lambda name: estimates[name]["seconds"]) if fitting else None
+    return ExecutionPlan(stats, memory_budget, estimates, strategy, max_line_items)
@@ -0,0 +1,198 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+"""
+import functools
+import hashlib
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+
+# Source files whose content defines the converter version used in cache keys
+_CONVERTER_SOURCES = ("excel_catalogue_to_xml.py", "helper_functions.py", "columnar_input.py")
+
+# Temporary files older than this are left over from a failed or killed write, not one in progress
+STALE_TMP_SECONDS = 15 * 60
+
+
+@functools.lru_cache(maxsize=None)
+def converter_fingerprint() -> str:
+    # Any change to the conversion code invalidates previously cached results
+    digest = hashlib.sha256()
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in _CONVERTER_SOURCES:
+        with open(os.path.join(module_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def config_fingerprint(config_file) -> str:
+    try:
+        with open(config_file, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def content_digest(excel_bytes: bytes, config_file, *options) -> str:
+    '''
+    Content hash of a conversion: input bytes, config file, converter version and options
+    :param excel_bytes: the Excel file as a byte-array
+    :param config_file: path to the cell location config used for the conversion
+    :param options: any further options that affect the output (e.g. max_line_items)
+    :return: hex digest
+    '''
+    digest = hashlib.sha256(excel_bytes)
+    digest.update(config_fingerprint(config_file).encode())
+    digest.update(converter_fingerprint().encode())
+    digest.update(repr(options).encode())
+    return digest.hexdigest()
+
+
+def cached_conversion(cache, digest, convert, deterministic=False, instance_identifier=None, creation_date_time=None,
+                      check_integrity=False) -> str:
+    '''
+    Runs a conversion through a result cache, shared by the Excel and columnar entry points
+    :param cache: ResultCache/DiskResultCache or any object with get/put
+    :param digest: content hash of the input and all options affecting the output, see content_digest
+    :param convert: callable returning the XML-string
+    :param check_integrity: the conversion runs an integrity check, which a cached result would skip
+    :return: XML-string
+    '''
+    if not deterministic and (instance_identifier is None or creation_date_time is None):
+        raise ValueError("A result cache requires deterministic mode or a given instance identifier and creation datetime.")
+
+    # A cached result would skip the line indexing, so the cache is only read without an integrity check
+    if not check_integrity:
+        result = cache.get(digest)
+        if result is not None:
+            return result
+
+    result = convert()
+
+    # The result is already there, a failing cache write (e.g. a full disk) must not lose it
+    try:
+        cache.put(digest, result)
+    except OSError as e:
+        warnings.warn(f"Result cache write failed: {e}")
+    return result
+
+
+class ResultCache:
+    """In-memory LRU cache of conversion results, bounded by entry count and total size."""
+
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value: str):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskResultCache:
+    """On-disk cache of conversion results, one file per key, evicting least recently used files above max_bytes."""
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.xml")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+        except OSError:
+            return None
+        # Touch the entry so that eviction is least recently used rather than oldest written
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value: str):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # E.g. a full disk, don't leave the partial file behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        stale_before = time.time() - STALE_TMP_SECONDS
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                # Left behind by a writer that was killed before it could clean up
+                try:
+                    if entry.stat().st_mtime < stale_before:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.name.endswith(".xml"):
+                # Another thread or pool process may evict the same entry concurrently
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
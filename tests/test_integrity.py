@@ -0,0 +1,69 @@
+import csv
+
+from columnar_input import columnar_to_xml
+from helper_functions import load_col_indices, separated_string
+from integrity import IntegrityCheck
+
+
+def test_resolve_reports_dangling_references_and_duplicates():
+    check = IntegrityCheck()
+    check.add_identifier("LINE_ID", "1", 3)
+    check.add_identifier("SELLERSITEMIDENTIFICATION_ID", "S1", 3)
+    check.add_identifier("LINE_ID", "2", 4)
+    check.add_identifier("STANDARDITEMIDENTIFICATION_ID", "07300000000001", 4)
+    check.add_identifier("LINE_ID", "1", 5)
+    check.add_reference("AccessoryRelatedItem", "S1", 4, "2")
+    check.add_reference("AccessoryRelatedItem", "07300000000001", 3, "1")
+    check.add_reference("RequiredRelatedItem", "2", 3, "1")
+    check.add_reference("ReplacedRelatedItem", "S9", 5, "1")
+
+    report = check.resolve()
+    assert not report.ok
+    assert report.duplicates == [{"field": "LINE_ID", "id": "1", "row": 5, "first_row": 3}]
+    assert report.dangling_references == [{"row": 5, "line_id": "1", "element": "ReplacedRelatedItem", "id": "S9"}]
+    assert report.as_dict(limit=0)["dangling_reference_count"] == 1
+
+
+def test_resolve_passes_clean_catalogue():
+    check = IntegrityCheck()
+    check.add_identifier("LINE_ID", "1", 3)
+    check.add_reference("ComponentRelatedItem", "1", 3, "1")
+    report = check.resolve()
+    assert report.ok
+    assert report.summary() == "Catalogue integrity check passed."
+
+
+def test_separated_string_drops_whitespace_and_empty_entries():
+    assert separated_string("A; B") == ["A", "B"]
+    assert separated_string("A;;B;") == ["A", "B"]
+    assert separated_string(" ; ") == []
+
+
+def _write_lines(path, rows):
+    cols = load_col_indices()
+    width = max(cols.values()) + 1
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(range(1, width + 1))
+        for values in rows:
+            row = [""] * width
+            for name, value in values.items():
+                row[cols[name]] = value
+            writer.writerow(row)
+
+
+def test_lists_are_checked_as_written_to_the_xml(tmp_path):
+    lines = tmp_path / "lines.csv"
+    sidecar = tmp_path / "header.json"
+    sidecar.write_text('{"header": {"CATALOGUE_ID": "CAT-1", "USE_SBDH": "NEJ"}}', encoding="utf-8")
+    _write_lines(lines, [{"LINE_ID": "1", "SELLERSITEMIDENTIFICATION_ID": "A", "ASSOCREL_ITEM_ID": "B; C"},
+                         {"LINE_ID": "2", "SELLERSITEMIDENTIFICATION_ID": "B", "REQUIREDREL_ITEM_ID": "A;;B"},
+                         {"LINE_ID": "3", "SELLERSITEMIDENTIFICATION_ID": "C"}])
+
+    check = IntegrityCheck()
+    xml = columnar_to_xml(str(lines), str(sidecar), integrity_check=check)
+    assert check.report.ok
+    assert "<cbc:ID> C</cbc:ID>" not in xml
+    assert "<cbc:ID></cbc:ID>" not in xml
+    assert xml.count("<cac:AccessoryRelatedItem>") == 2
+    assert xml.count("<cac:RequiredRelatedItem>") == 2
@@ -0,0 +1,56 @@
+import os
+import pickle
+import sys
+
+import pytest
+
+from planner import STRATEGIES, MemoryBudgetExceeded, inspect_workbook, plan_conversion
+
+pytest.importorskip("openpyxl")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from planner_memory import make_workbook, measure  # noqa: E402
+
+LINES = 1500
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("planner") / "catalogue.xlsx")
+    make_workbook(path, LINES, columns=100)
+    return path
+
+
+def test_inspect_workbook_counts_lines_and_cells(workbook):
+    stats = inspect_workbook(workbook)
+    assert stats.line_rows == LINES
+    assert stats.line_columns == 100
+    # Extrapolated from the start of the sheet, the two template header rows included
+    assert abs(stats.line_cells - (LINES + 2) * 100) < 0.05 * LINES * 100
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_estimate_is_not_below_measured_peak(workbook, strategy):
+    estimated = plan_conversion(workbook).estimates[strategy]["memory"]
+    assert estimated >= measure(workbook, strategy)
+
+
+def test_max_line_items_lowers_the_estimate(workbook):
+    full = plan_conversion(workbook)
+    limited = plan_conversion(workbook, max_line_items=10)
+    for strategy in STRATEGIES:
+        assert limited.estimates[strategy]["memory"] < full.estimates[strategy]["memory"]
+
+    # A budget that only fits when the conversion stops early
+    budget = (limited.estimates["streaming"]["memory"] + full.estimates["streaming"]["memory"]) // 2
+    assert plan_conversion(workbook, budget).strategy is None
+    assert plan_conversion(workbook, budget, max_line_items=10).strategy is not None
+
+
+def test_budget_exceeded_is_raised_before_parsing(workbook):
+    from excel_catalogue_to_xml import excel_to_xml
+
+    with pytest.raises(MemoryBudgetExceeded) as info:
+        excel_to_xml(workbook, memory_budget=1024 * 1024)
+    assert f"for {LINES} catalogue lines" in str(info.value)
+    # Survives a process pool
+    assert pickle.loads(pickle.dumps(info.value)).plan.strategy is None
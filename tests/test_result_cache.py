@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+import result_cache
+from result_cache import DiskResultCache, ResultCache, cached_conversion
+
+
+def test_memory_cache_evicts_least_recently_used_entry():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_memory_cache_evicts_above_max_bytes():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", "x" * 6)
+    cache.put("b", "y" * 6)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 6
+    # A single result larger than the whole cache is not stored at all
+    cache.put("c", "z" * 11)
+    assert cache.get("c") is None
+    assert len(cache) == 1
+
+
+def test_disk_cache_evicts_least_recently_used_file(tmp_path):
+    cache = DiskResultCache(str(tmp_path), max_bytes=25)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    # Reading "a" makes "b" the least recently used entry
+    past = time.time() - 60
+    os.utime(tmp_path / "b.xml", (past, past))
+    assert cache.get("a") == "x" * 10
+    cache.put("c", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10
+    assert cache.get("c") == "z" * 10
+
+
+def test_disk_cache_failed_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    cache = DiskResultCache(str(tmp_path))
+
+    def full_disk(src, dst):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(result_cache.os, "replace", full_disk)
+    with pytest.raises(OSError):
+        cache.put("a", "x" * 10)
+    assert os.listdir(tmp_path) == []
+
+
+def test_disk_cache_removes_stale_temporary_files(tmp_path):
+    stale = tmp_path / "a.xml.1.1.tmp"
+    fresh = tmp_path / "b.xml.2.2.tmp"
+    stale.write_text("partial")
+    fresh.write_text("in progress")
+    past = time.time() - result_cache.STALE_TMP_SECONDS - 60
+    os.utime(stale, (past, past))
+
+    DiskResultCache(str(tmp_path)).put("c", "x")
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_cached_conversion_requires_a_stable_envelope():
+    with pytest.raises(ValueError):
+        cached_conversion(ResultCache(), "key", lambda: "<xml/>")
+
+
+def test_cached_conversion_reads_and_fills_the_cache():
+    cache = ResultCache()
+    calls = []
+
+    def convert():
+        calls.append(1)
+        return "<xml/>"
+
+    assert cached_conversion(cache, "key", convert, deterministic=True) == "<xml/>"
+    assert cached_conversion(cache, "key", convert, deterministic=True) == "<xml/>"
+    assert len(calls) == 1
+    # An integrity check needs the lines, so the cached result is not used
+    cached_conversion(cache, "key", convert, deterministic=True, check_integrity=True)
+    assert len(calls) == 2
+
+
+def test_cached_conversion_only_tolerates_io_errors_on_write():
+    class FailingCache:
+        def __init__(self, error):
+            self.error = error
+
+        def get(self, key):
+            return None
+
+        def put(self, key, value):
+            raise self.error
+
+    with pytest.warns(UserWarning, match="No space left"):
+        result = cached_conversion(FailingCache(OSError(28, "No space left on device")), "key", lambda: "<xml/>", deterministic=True)
+    assert result == "<xml/>"
+    with pytest.raises(TypeError):
+        cached_conversion(FailingCache(TypeError("bad key")), "key", lambda: "<xml/>", deterministic=True)
@@ -0,0 +1,380 @@
+"""
+ * Copyright (C) 2023 SFTI and Swedish Local Authorities and Regions (SALAR)
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *         http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+Resident conversion worker. Keeps openpyxl, the config and the column index table loaded
+and runs conversion jobs, read as JSON lines from stdin or a local Unix socket, on a pool.
+
+    python -m excel_catalogue_to_xml serve [--socket PATH] [--workers N] [--pool process|thread] [--config CFG]
+    python -m excel_catalogue_to_xml convert INPUT [-o OUTPUT] [--max-line-items N] [--deterministic] [--header TEMPLATE] [--config CFG]
+
+A job is one JSON object per line, answered by one JSON line with the same "id":
+
+    {"id": 1, "input": "in.xlsx", "output": "out.xml", "max_line_items": 100, "deterministic": true}
+    {"id": 1, "status": "ok", "output": "out.xml", "bytes": 12345, "seconds": 0.41, "latency": 0.52}
+
+{"op": "stats"} returns queue depth, throughput and latency statistics instead.
+"""
+import argparse
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from columnar_input import columnar_to_xml
+from excel_catalogue_to_xml import excel_to_xml, _workbook_loader
+from helper_functions import CONFIG_FILE, load_config, load_col_indices
+from integrity import IntegrityCheck
+
+# Maximum number of dangling references/duplicates listed in a job response
+INTEGRITY_REPORT_LIMIT = 100
+
+# Result cache and default config of the current (pool) process, set up by warm_up()
+_cache = None
+_config_file = CONFIG_FILE
+
+
+def warm_up(cache_dir=None, cache_bytes=None, config_file=CONFIG_FILE):
+    # Pay for imports and config parsing once per pool process instead of once per job
+    global _cache, _config_file
+    _config_file = config_file
+    _workbook_loader()
+    load_config(config_file)
+    load_col_indices(config_file)
+    if cache_dir is not None and _cache is None:
+        from result_cache import DiskResultCache
+        _cache = DiskResultCache(cache_dir, cache_bytes) if cache_bytes else DiskResultCache(cache_dir)
+
+
+def write_output(path, xml: str):
+    # Write to a temporary file first so that readers never see a partial result
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(xml)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def run_job(job: dict) -> dict:
+    '''
+    Runs a single conversion job
+    :param job: dict with "input", "output" and optional "max_line_items", "deterministic", "instance_identifier", "creation_date_time",
+                "check_integrity", "fail_on_integrity_errors", "memory_budget", "strategy",
+                "header" (template workbook or JSON sidecar when the input is CSV/Parquet/Arrow),
+                "config_file" (cell location config, the worker's --config by default)
+    :return: dict with the output path, its size, the conversion time and the integrity report if requested
+    '''
+    start = time.perf_counter()
+    creation_date_time = job.get("creation_date_time")
+    if creation_date_time is not None:
+        # Naive (or Z-suffixed) times are taken as UTC, offset-aware times are converted to UTC
+        creation_date_time = datetime.fromisoformat(creation_date_time.rstrip("Z"))
+        if creation_date_time.tzinfo is not None:
+            creation_date_time = creation_date_time.astimezone(timezone.utc).replace(tzinfo=None)
+    deterministic = bool(job.get("deterministic", False))
+    integrity_check = IntegrityCheck() if job.get("check_integrity") else None
+
+    options = dict(max_line_items=job.get("max_line_items"), instance_identifier=job.get("instance_identifier"),
+                   creation_date_time=creation_date_time, deterministic=deterministic, cache=_cache if deterministic else None,
+                   integrity_check=integrity_check, fail_on_integrity_errors=bool(job.get("fail_on_integrity_errors", False)),
+                   config_file=job.get("config_file") or _config_file)
+
+    # CSV/Parquet/Arrow catalogue lines come with a template workbook or JSON sidecar for the header and code lists
+    if job.get("header") is not None:
+        xml = columnar_to_xml(job["input"], job["header"], **options)
+    else:
+        xml = excel_to_xml(job["input"], memory_budget=job.get("memory_budget"), strategy=job.get("strategy"), **options)
+    write_output(job["output"], xml)
+
+    result = {"output": job["output"], "bytes": len(xml), "seconds": round(time.perf_counter() - start, 6)}
+    if integrity_check is not None:
+        result["integrity"] = integrity_check.report.as_dict(limit=INTEGRITY_REPORT_LIMIT)
+    return result
+
+
+class ConversionWorker:
+    """Runs conversion jobs on a warmed pool and keeps queue and latency statistics."""
+
+    def __init__(self, workers=None, pool="process", cache_dir=None, cache_bytes=None, latency_window=1000, config_file=CONFIG_FILE):
+        if pool not in ("process", "thread"):
+            raise ValueError(f"Unknown pool type: {pool}")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = pool
+        self._initargs = (cache_dir, cache_bytes, config_file)
+        self._executor = self._new_executor()
+        self._restarts = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._finished_at = deque(maxlen=latency_window)
+
+    def _new_executor(self):
+        executor_type = futures.ProcessPoolExecutor if self.pool == "process" else futures.ThreadPoolExecutor
+        return executor_type(max_workers=self.workers, initializer=warm_up, initargs=self._initargs)
+
+    def _replace_broken_executor(self, broken):
+        # A pool process that dies (e.g. OOM killed) breaks the whole pool, so later jobs get a new, warmed one
+        with self._lock:
+            if self._executor is broken:
+                self._executor = self._new_executor()
+                self._restarts += 1
+            executor = self._executor
+        broken.shutdown(wait=False)
+        return executor
+
+    def submit(self, job: dict, respond):
+        '''
+        Queues a job and calls respond(dict) from a pool callback thread once it has finished
+        :param job: job dict, see run_job
+        :param respond: callable receiving the JSON-serialisable response
+        :return: future that is resolved with the response after respond() has returned
+        '''
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._submitted += 1
+        executor = self._executor
+        try:
+            try:
+                future = executor.submit(run_job, job)
+            except BrokenProcessPool:
+                executor = self._replace_broken_executor(executor)
+                future = executor.submit(run_job, job)
+        except Exception as e:
+            # Answered as a failed job rather than raised into the server loop
+            future = futures.Future()
+            future.set_exception(e)
+        # The job future resolves before its callbacks run, so callers wait on the response instead
+        answered = futures.Future()
+
+        def done(f):
+            finished_at = time.monotonic()
+            response = {"id": job.get("id")}
+            try:
+                response.update(status="ok", **f.result())
+            except Exception as e:
+                response.update(status="error", error=str(e) or type(e).__name__)
+                if isinstance(e, BrokenProcessPool):
+                    self._replace_broken_executor(executor)
+            response["latency"] = round(finished_at - submitted_at, 6)
+
+            with self._lock:
+                if response["status"] == "ok":
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._latencies.append(finished_at - submitted_at)
+                self._finished_at.append(finished_at)
+            try:
+                respond(response)
+            finally:
+                answered.set_result(response)
+
+        future.add_done_callback(done)
+        return answered
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            finished = self._completed + self._failed
+            latencies = sorted(self._latencies)
+            window = now - self._finished_at[0] if len(self._finished_at) > 1 else 0
+
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 6) if latencies else None
+
+            return {
+                "pool": self.pool,
+                "workers": self.workers,
+                "pool_restarts": self._restarts,
+                "uptime": round(now - self._started, 3),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "queue_depth": self._submitted - finished,
+                "jobs_per_second": round(len(self._finished_at) / window, 3) if window > 0 else None,
+                "latency_mean": round(sum(latencies) / len(latencies), 6) if latencies else None,
+                "latency_p50": percentile(0.50),
+                "latency_p95": percentile(0.95),
+                "latency_max": round(latencies[-1], 6) if latencies else None,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def handle_line(worker: ConversionWorker, line: str, respond):
+    # Returns the response future of a queued job, or None if the line was answered directly
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        job = json.loads(line)
+        if not isinstance(job, dict):
+            raise ValueError("Job must be a JSON object")
+    except ValueError as e:
+        respond({"id": None, "status": "error", "error": f"Invalid job: {e}"})
+        return None
+
+    op = job.get("op", "convert")
+    if op == "stats":
+        respond(dict(id=job.get("id"), status="ok", **worker.stats()))
+        return None
+    if op != "convert":
+        respond({"id": job.get("id"), "status": "error", "error": f"Unknown op: {op}"})
+        return None
+    if "input" not in job or "output" not in job:
+        respond({"id": job.get("id"), "status": "error", "error": "Job must name an input and an output path"})
+        return None
+    return worker.submit(job, respond)
+
+
+def json_line_writer(stream):
+    lock = threading.Lock()
+
+    def respond(response):
+        data = json.dumps(response, ensure_ascii=False) + "\n"
+        with lock:
+            stream.write(data)
+            stream.flush()
+
+    return respond
+
+
+def serve_stdin(worker: ConversionWorker, stdin=sys.stdin, stdout=sys.stdout):
+    # Serves until end of input, then waits for all queued jobs
+    respond = json_line_writer(stdout)
+    pending = []
+    for line in stdin:
+        future = handle_line(worker, line, respond)
+        if future is not None:
+            pending.append(future)
+            pending = [f for f in pending if not f.done()]
+    futures.wait(pending)
+
+
+class _JobRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        writer = self.wfile
+
+        class _TextWriter:
+            # Adapts the binary socket stream to the text writer used by json_line_writer
+            def write(self, data):
+                writer.write(data.encode("utf-8"))
+
+            def flush(self):
+                writer.flush()
+
+        respond = json_line_writer(_TextWriter())
+        pending = []
+        for line in self.rfile:
+            future = handle_line(self.server.worker, line.decode("utf-8"), respond)
+            if future is not None:
+                pending.append(future)
+        # Keep the connection open until every job sent on it has been answered
+        futures.wait(pending)
+
+
+class _UnixJobServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, worker):
+        self.worker = worker
+        super().__init__(path, _JobRequestHandler)
+
+
+def serve_socket(worker: ConversionWorker, path):
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        # Only a socket left behind by an earlier server is replaced, never a file given by mistake
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{path} exists and is not a socket")
+        os.remove(path)
+    with _UnixJobServer(path, worker) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m excel_catalogue_to_xml", description="Excel to Peppol BIS Catalogue XML converter")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run a resident worker reading JSON-lines jobs")
+    serve.add_argument("--socket", help="Listen on this Unix socket instead of stdin/stdout")
+    serve.add_argument("--workers", type=int, default=None, help="Pool size (default: number of CPUs)")
+    serve.add_argument("--pool", choices=("process", "thread"), default="process")
+    serve.add_argument("--cache-dir", help="Directory for a result cache shared by deterministic jobs")
+    serve.add_argument("--cache-bytes", type=int, default=None, help="Size limit of the result cache")
+    serve.add_argument("--config", default=CONFIG_FILE, help="Cell location config for jobs that do not name one")
+
+    convert = commands.add_parser("convert", help="Convert a single file")
+    convert.add_argument("input")
+    convert.add_argument("-o", "--output", help="Output path (default: stdout)")
+    convert.add_argument("--max-line-items", type=int, default=None)
+    convert.add_argument("--deterministic", action="store_true")
+    convert.add_argument("--memory-budget", type=int, default=None, help="Memory budget in bytes, see planner.py")
+    convert.add_argument("--strategy", choices=("in-memory", "streaming"), default=None)
+    convert.add_argument("--header", help="Template workbook or JSON sidecar, when INPUT is CSV/Parquet/Arrow catalogue lines")
+    convert.add_argument("--config", default=CONFIG_FILE, help="Cell location config (default: ExcelCellLocations.cfg next to the converter)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        if args.header:
+            xml = columnar_to_xml(args.input, args.header, max_line_items=args.max_line_items, deterministic=args.deterministic,
+                                  config_file=args.config)
+        else:
+            xml = excel_to_xml(args.input, max_line_items=args.max_line_items, deterministic=args.deterministic,
+                               memory_budget=args.memory_budget, strategy=args.strategy, config_file=args.config)
+        if args.output:
+            write_output(args.output, xml)
+        else:
+            sys.stdout.write(xml)
+        return 0
+
+    worker = ConversionWorker(workers=args.workers, pool=args.pool, cache_dir=args.cache_dir, cache_bytes=args.cache_bytes,
+                              config_file=args.config)
+    try:
+        if args.socket:
+            serve_socket(worker, args.socket)
+        else:
+            serve_stdin(worker)
+    finally:
+        worker.shutdown()
+    return 0